@@ -0,0 +1,98 @@
+
+# This compares recall and latency of ToolMemory's approximate indexes against exact
+# (brute-force) scoring, on clustered random embeddings (no embedding API calls).
+
+import statistics
+import time
+
+import numpy as np
+
+from tool_see.utils.ann_utils import HNSWIndex, IVFIndex, PQIndex
+from tool_see.utils.quant_utils import ScalarQuantizedMatrix
+from tool_see.utils.vector_utils import EmbeddingMatrix, normalize_rows, top_k_indices
+
+
+DIM = 384  # e.g. all-MiniLM-L12-v2
+N_TOOLS = 20_000
+N_CLUSTERS = 200  # real tool embeddings are clustered by domain
+NOISE = 1.0
+QUERIES = 200
+TOP_K = 10
+
+
+def make_data(rng: np.random.Generator):
+    centers = rng.standard_normal((N_CLUSTERS, DIM), dtype=np.float32)
+    tools = centers[rng.integers(0, N_CLUSTERS, N_TOOLS)]
+    tools += NOISE * rng.standard_normal((N_TOOLS, DIM), dtype=np.float32)
+    queries = centers[rng.integers(0, N_CLUSTERS, QUERIES)]
+    queries += NOISE * rng.standard_normal((QUERIES, DIM), dtype=np.float32)
+    return tools, normalize_rows(queries)
+
+
+def evaluate(search, queries: np.ndarray, truth):
+    """Median latency (ms) and mean recall@TOP_K of `search(query) -> rows`."""
+    times = []
+    recalls = []
+    for q, expected in zip(queries, truth):
+        t0 = time.perf_counter()
+        rows = search(q)
+        t1 = time.perf_counter()
+        times.append((t1 - t0) * 1000)
+        recalls.append(len(expected & set(rows.tolist())) / TOP_K)
+    return statistics.median(times), statistics.mean(recalls)
+
+
+def report(name: str, latency_ms: float, recall: float):
+    print(f"{name:<28} {latency_ms:>12.3f} {recall:>10.4f}")
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(42)
+    tools, queries = make_data(rng)
+    matrix = EmbeddingMatrix(DIM)
+    matrix.upsert([f"tool_{i}" for i in range(N_TOOLS)], tools)
+    vectors = matrix.vectors
+    truth = [set(top_k_indices(matrix.scores(q), TOP_K).tolist()) for q in queries]
+
+    print(f"tools={N_TOOLS} dim={DIM} queries={QUERIES} recall@{TOP_K}")
+    print(f"{'method':<28} {'median (ms)':>12} {'recall':>10}")
+    report("exact", *evaluate(lambda q: top_k_indices(vectors @ q, TOP_K), queries, truth))
+
+    print(f"(float32 matrix: {vectors.nbytes / 2**20:.1f} MiB)")
+    for dtype in ScalarQuantizedMatrix.DTYPES:
+        quantized = ScalarQuantizedMatrix(dtype)
+        quantized.add(vectors, range(N_TOOLS))
+        print(f"({dtype} codes: {quantized.nbytes / 2**20:.1f} MiB)")
+        search = lambda q: top_k_indices(quantized.scores(q), TOP_K)
+        report(f"{dtype}", *evaluate(search, queries, truth))
+
+        def rescored(q, factor=4):
+            candidates = top_k_indices(quantized.scores(q), TOP_K * factor)
+            return candidates[top_k_indices(vectors[candidates] @ q, TOP_K)]
+
+        report(f"{dtype} + rescore x4", *evaluate(rescored, queries, truth))
+
+    hnsw = HNSWIndex(M=16, ef_construction=100)
+    t0 = time.perf_counter()
+    hnsw.add(vectors, range(N_TOOLS))
+    print(f"(hnsw build: {time.perf_counter() - t0:.1f} s)")
+    for ef in [16, 32, 64, 128, 256]:
+        search = lambda q: hnsw.search(vectors, q, TOP_K, ef_search=ef)[0]
+        report(f"hnsw ef_search={ef}", *evaluate(search, queries, truth))
+
+    ivf = IVFIndex(nlist=256)
+    t0 = time.perf_counter()
+    ivf.add(vectors, range(N_TOOLS))
+    ivf.train(vectors)  # train on the full catalog rather than the first auto_train_size rows
+    print(f"(ivf build: {time.perf_counter() - t0:.1f} s)")
+    for nprobe in [1, 4, 8, 16, 32]:
+        search = lambda q: ivf.search(vectors, q, TOP_K, nprobe=nprobe)[0]
+        report(f"ivf nprobe={nprobe}", *evaluate(search, queries, truth))
+
+    pq = PQIndex(m=48)
+    t0 = time.perf_counter()
+    pq.add(vectors, range(N_TOOLS))
+    print(f"(pq build: {time.perf_counter() - t0:.1f} s, codes: {N_TOOLS * 48 / 2**20:.1f} MiB)")
+    for rerank in [0, 4, 10, 32]:
+        search = lambda q: pq.search(vectors, q, TOP_K, rerank=rerank)[0]
+        report(f"pq m=48 rerank={rerank}", *evaluate(search, queries, truth))
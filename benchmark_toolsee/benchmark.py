@@ -7,6 +7,7 @@ import requests
 import logging
 import statistics
 import random
+from typing import Optional
 
 from deepeval import evaluate
 from deepeval.test_case import LLMTestCase, ToolCall
@@ -103,6 +104,16 @@ logger.info(f"Total tokens for all tools: {ALL_TOOLS_TOKENS}")
 
 # Evaluation setup
 
+# Selection strategies compared by the benchmark: None is the original fixed
+# top_k = len(expected tools) + 5; the others pick k without knowing the expected tools.
+SELECTION_STRATEGIES = {
+    "fixed (expected + 5)": None,
+    "fixed top_k=10": {"top_k": 10},
+    "adaptive gap": {"top_k": 10, "cutoff": "gap"},
+    "adaptive elbow": {"top_k": 10, "cutoff": "elbow"},
+    "adaptive ratio 0.9": {"top_k": 10, "cutoff": "ratio", "cutoff_ratio": 0.9},
+}
+
 def evaluate_cases(test_cases: list[LLMTestCase]):
     scores = []
     metric = ToolCorrectnessMetric()
@@ -112,22 +123,26 @@ def evaluate_cases(test_cases: list[LLMTestCase]):
     score = statistics.mean(scores) if scores else 0.0
     return score
 
-def process_dataset(dataset: list[dict]):
+def process_dataset(dataset: list[dict], selection_params: Optional[dict] = None) -> dict:
     query_times = []
     test_cases = []
     tokens_used = []
+    tools_selected = []
     for item in dataset:
         query = item["query"]
         expected_tools = item["tool"]
         t0 = time.perf_counter()
+        params = selection_params or {"top_k": len(expected_tools) + 5}
         selected_tools = select_tools_for_query(
-            query=query, top_k=len(expected_tools) + 5,
+            query=query,
             tool_memory=tool_memory,
+            **params,
         )
         t1 = time.perf_counter()
         tokens_used.append(count_tokens(selected_tools))
         logger.debug(f"selected_tools: {selected_tools}")
         selected_tool_names = [tool["_tool_id"] for tool in selected_tools]
+        tools_selected.append(len(selected_tool_names))
         logger.debug(f"selected_tool_names: {selected_tool_names}")
         query_times.append(t1 - t0)
         test_case = LLMTestCase(
@@ -145,6 +160,27 @@ def process_dataset(dataset: list[dict]):
     logger.info("Tool selection accuracy: %.4f", score)
     logger.info("Latency: median=%.2f ms", statistics.median(query_times) * 1000)
     logger.info("Token savings: median=%.2f", statistics.median(tokens_saved_ratio))
+    return {
+        "accuracy": score,
+        "latency_ms": statistics.median(query_times) * 1000,
+        "token_savings": statistics.median(tokens_saved_ratio),
+        "tools": statistics.mean(tools_selected),
+    }
+
+
+def compare_strategies(dataset: list[dict]):
+    """Accuracy vs. token savings of each selection strategy on `dataset`."""
+    results = {}
+    for name, params in SELECTION_STRATEGIES.items():
+        logger.info("------------ Strategy: %s ------------", name)
+        results[name] = process_dataset(dataset, params)
+
+    logger.info("%-22s %9s %14s %11s %12s", "strategy", "accuracy", "token savings",
+                "mean tools", "latency ms")
+    for name, r in results.items():
+        logger.info("%-22s %9.4f %14.2f %11.2f %12.2f", name, r["accuracy"],
+                    r["token_savings"], r["tools"], r["latency_ms"])
+    return results
 
 
 logger.info("============ Running multi-tool selection benchmark... ============")
@@ -153,7 +189,7 @@ with open(datasets / "multi_tool_query_golden.json") as f:
     multi_tool_data = json.load(f)
 
 if __name__ == "__main__":
-    process_dataset(multi_tool_data)
+    compare_strategies(multi_tool_data)
 
 
 logger.info("============ Running single-tool selection benchmark... ============")
@@ -187,4 +223,4 @@ single_tool_data = random.sample(single_tool_data, 500)
 logger.info(f"Using random sample of 500 data points for single-tool benchmark.")
 
 if __name__ == "__main__":
-    process_dataset(single_tool_data)
+    compare_strategies(single_tool_data)
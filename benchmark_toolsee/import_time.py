@@ -0,0 +1,42 @@
+# This measures the cost of `import tool_see` and of building the shared LLM / embedding
+# clients on first use, each in a fresh interpreter, and checks that importing the package
+# leaves no files (such as llm_cache.db) in the working directory.
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+RUNS = 5
+STEPS = {
+    "python (baseline)": "pass",
+    "import tool_see": "import tool_see",
+    "+ get_embeddings()": "import tool_see.utils.llm_utils as u; u.get_embeddings()",
+    "+ get_llm()": "import tool_see.utils.llm_utils as u; u.get_llm()",
+}
+
+
+def run_once(code: str, cwd: str, env: dict) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+    # the clients only need a key to be constructed; nothing is sent
+    env.setdefault("OPENAI_API_KEY", "sk-import-benchmark")
+    env.setdefault("EMBED_API_KEY", "sk-import-benchmark")
+
+    print(f"{'step':<22} {'median ms':>10} {'files left in cwd'}")
+    for name, code in STEPS.items():
+        with tempfile.TemporaryDirectory() as cwd:
+            run_once(code, cwd, env)  # warm the bytecode and OS caches
+            times = [run_once(code, cwd, env) for _ in range(RUNS)]
+            leftovers = sorted(os.listdir(cwd))
+        print(f"{name:<22} {statistics.median(times):>10.1f} {', '.join(leftovers) or '-'}")
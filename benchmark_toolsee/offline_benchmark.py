@@ -0,0 +1,62 @@
+# This measures end-to-end ToolMemory ingestion and query latency, and peak process memory,
+# with the local HashingEmbeddings backend (no network needed).
+
+import random
+import resource
+import statistics
+import time
+
+from tool_see import HashingEmbeddings, ToolMemory, select_tools_for_query
+
+
+DIM = 384
+TOP_K = 5
+QUERIES = 50
+CATALOG_SIZES = [1_000, 10_000, 50_000]
+VERBS = ["get", "list", "create", "update", "delete", "search", "sync", "export", "upload"]
+NOUNS = ["invoice", "customer", "ticket", "branch", "object", "bucket", "calendar", "event"]
+NOUNS += ["order", "payment", "report", "user", "message", "file", "repository", "refund"]
+
+
+def make_tools(rng: random.Random, n: int):
+    tools = []
+    for i in range(n):
+        verb, noun, other = rng.choice(VERBS), rng.choice(NOUNS), rng.choice(NOUNS)
+        tools.append(
+            (
+                f"tool_{i}",
+                {
+                    "name": f"{verb}_{noun}_{i}",
+                    "description": f"{verb.capitalize()} a {noun} and its {other} records",
+                },
+            )
+        )
+    return tools
+
+
+if __name__ == "__main__":
+    rng = random.Random(42)
+    queries = [f"{rng.choice(VERBS)} the {rng.choice(NOUNS)}" for _ in range(QUERIES)]
+
+    print(f"dim={DIM} top_k={TOP_K} queries={QUERIES}")
+    print(
+        f"{'tools':>8} {'ingest (s)':>11} {'tools/s':>9} {'query (ms)':>11}"
+        f" {'peak RSS (MiB)':>15}"
+    )
+    for n in CATALOG_SIZES:
+        tool_memory = ToolMemory(embeddings=HashingEmbeddings(DIM), query_cache_size=0)
+        tools = make_tools(rng, n)
+        t0 = time.perf_counter()
+        tool_memory.add_tools(tools)
+        ingest_s = time.perf_counter() - t0
+
+        times = []
+        for query in queries:
+            t0 = time.perf_counter()
+            select_tools_for_query(query, tool_memory, top_k=TOP_K)
+            times.append((time.perf_counter() - t0) * 1000)
+        peak_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+        print(
+            f"{n:>8} {ingest_s:>11.2f} {n / ingest_s:>9.0f} {statistics.median(times):>11.3f}"
+            f" {peak_mib:>15.1f}"
+        )
@@ -0,0 +1,63 @@
+
+# This compares top-k selection strategies of ToolMemory.query on random embeddings,
+# so it measures scoring + selection only (no embedding API calls).
+
+import statistics
+import time
+
+import numpy as np
+
+from tool_see.utils.vector_utils import EmbeddingMatrix, top_k_indices
+
+
+DIM = 384  # e.g. all-MiniLM-L12-v2
+TOP_K = 5
+QUERIES = 20
+CATALOG_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def full_sort(ids, scores: np.ndarray, k: int):
+    # Previous behaviour: one tuple per tool, then a full sort
+    results = [(tid, float(score)) for tid, score in zip(ids, scores)]
+    results.sort(key=lambda x: x[1], reverse=True)
+    return results[:k]
+
+
+def partial_select(ids, scores: np.ndarray, k: int):
+    return [(ids[i], float(scores[i])) for i in top_k_indices(scores, k)]
+
+
+def time_ms(fn, matrix: EmbeddingMatrix, queries: np.ndarray) -> float:
+    times = []
+    for q in queries:
+        t0 = time.perf_counter()
+        fn(matrix.ids, matrix.scores(q), TOP_K)
+        t1 = time.perf_counter()
+        times.append((t1 - t0) * 1000)
+    return statistics.median(times)
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(42)
+    queries = rng.standard_normal((QUERIES, DIM), dtype=np.float32)
+
+    print(f"dim={DIM} top_k={TOP_K} queries={QUERIES} (median latency per query)")
+    print(f"{'tools':>10} {'full sort (ms)':>15} {'top-k select (ms)':>18} {'speedup':>8}")
+    for n in CATALOG_SIZES:
+        matrix = EmbeddingMatrix(DIM)
+        batch = 100_000
+        for start in range(0, n, batch):
+            count = min(batch, n - start)
+            ids = [f"tool_{i}" for i in range(start, start + count)]
+            matrix.upsert(ids, rng.standard_normal((count, DIM), dtype=np.float32))
+
+        for q in queries[:3]:  # sanity check: both strategies agree
+            scores = matrix.scores(q)
+            assert [t for t, _ in full_sort(matrix.ids, scores, TOP_K)] == [
+                t for t, _ in partial_select(matrix.ids, scores, TOP_K)
+            ]
+
+        sort_ms = time_ms(full_sort, matrix, queries)
+        select_ms = time_ms(partial_select, matrix, queries)
+        print(f"{n:>10} {sort_ms:>15.2f} {select_ms:>18.2f} {sort_ms / select_ms:>7.1f}x")
+        del matrix
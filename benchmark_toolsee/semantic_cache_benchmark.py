@@ -0,0 +1,91 @@
+# This measures the semantic query cache of ToolMemory: the cost of a cache lookup vs. a
+# full catalog query, and the hit rate on rephrased queries, with the offline
+# HashingEmbeddings backend (no API calls).
+
+import random
+import statistics
+import time
+
+from tool_see import HashingEmbeddings, ToolMemory
+
+
+TOP_K = 5
+CATALOG_SIZES = [10_000, 100_000]
+CACHE_SIZE = 256
+THRESHOLDS = [0.95, 0.9, 0.8]
+VERBS = ["get", "list", "create", "update", "delete", "search", "sync", "export", "upload"]
+NOUNS = ["invoice", "customer", "ticket", "branch", "file", "bucket", "calendar", "event"]
+# rephrasings of the same intent, as agents tend to produce them
+TEMPLATES = ["{v} {n}s", "{v} the {n}s", "please {v} all {n}s", "{v} {n}s in the workspace"]
+
+
+def make_tools(rng: random.Random, n: int):
+    return [
+        (
+            f"tool_{i}",
+            {
+                "name": f"{rng.choice(VERBS)}_{rng.choice(NOUNS)}_{i}",
+                "description": f"{rng.choice(VERBS)} {rng.choice(NOUNS)} records",
+            },
+        )
+        for i in range(n)
+    ]
+
+
+def median_ms(fn, queries) -> float:
+    times = []
+    for q in queries:
+        t0 = time.perf_counter()
+        fn(q)
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def run_cached(memory: ToolMemory, queries):
+    """(top-1 tool id, latency in ms, whether the cache answered) of each query."""
+    cache = memory.semantic_cache
+    runs = []
+    for q in queries:
+        hits = cache.hits
+        t0 = time.perf_counter()
+        top = memory.query(q, top_k=TOP_K)[0][0]
+        runs.append((top, (time.perf_counter() - t0) * 1000, cache.hits > hits))
+    return runs
+
+
+if __name__ == "__main__":
+    rng = random.Random(42)
+    intents = [(v, n) for v in VERBS for n in NOUNS]
+    queries = [rng.choice(TEMPLATES).format(v=v, n=n) for v, n in rng.choices(intents, k=500)]
+
+    print(f"top_k={TOP_K} cache_size={CACHE_SIZE} queries={len(queries)} (median latency)")
+    print(
+        f"{'tools':>8} {'threshold':>9} {'no cache (ms)':>14} {'hit (ms)':>9}"
+        f" {'hit rate':>9} {'hits w/ same top-1':>19}"
+    )
+    for n in CATALOG_SIZES:
+        tools = make_tools(rng, n)
+        embeddings = HashingEmbeddings()
+        plain = ToolMemory(embeddings=embeddings)
+        plain.add_tools(tools)
+        expected = {q: plain.query(q, top_k=TOP_K)[0][0] for q in set(queries)}
+        no_cache_ms = median_ms(lambda q: plain.query(q, top_k=TOP_K), queries)
+        for threshold in THRESHOLDS:
+            memory = ToolMemory(
+                embeddings=embeddings,
+                semantic_cache_size=CACHE_SIZE,
+                semantic_cache_threshold=threshold,
+            )
+            memory.add_tools(tools)
+            # only answers served by the cache can differ from an uncached query
+            runs = run_cached(memory, queries)
+            hits = [(q, top) for q, (top, _, hit) in zip(queries, runs) if hit]
+            hit_rate = len(hits) / len(queries)
+            same = sum(top == expected[q] for q, top in hits) / len(hits) if hits else 1.0
+            # the cache is warm by now; time the lookups that hit
+            hit_times = [ms for _, ms, hit in run_cached(memory, queries) if hit]
+            hit_ms = statistics.median(hit_times) if hit_times else float("nan")
+            print(
+                f"{n:>8} {threshold:>9.2f} {no_cache_ms:>14.2f} {hit_ms:>9.3f}"
+                f" {hit_rate:>9.1%} {same:>19.1%}"
+            )
@@ -122,7 +122,7 @@ def test_ingestion_latency():
     insert_times = []
     for r in range(runs):
         # ensure empty store for each run
-        tool_memory._store = {}
+        tool_memory.clear()
         t0 = time.perf_counter()
         tool_memory.add_tools(tools)
         t1 = time.perf_counter()
@@ -0,0 +1,10 @@
+import pytest
+
+from tool_see.utils import token_utils
+
+
+@pytest.fixture(autouse=True)
+def offline_token_counts(monkeypatch):
+    """Estimate token counts instead of downloading the tiktoken encoding."""
+    monkeypatch.setattr(token_utils, "_loaded", True)
+    monkeypatch.setattr(token_utils, "_encoding", None)
@@ -0,0 +1,54 @@
+import pytest
+
+from tool_see import HashingEmbeddings, ToolMemory, select_tools_for_query
+from tool_see.tool_searcher import CUTOFFS, adaptive_k
+
+
+@pytest.mark.parametrize("method", CUTOFFS)
+def test_no_more_scores_than_min_k(method):
+    assert adaptive_k([], method) == 0
+    assert adaptive_k([0.9], method) == 1
+    assert adaptive_k([0.9, 0.1], method, min_k=5) == 2
+
+
+@pytest.mark.parametrize("method", CUTOFFS)
+def test_flat_scores_keep_all(method):
+    assert adaptive_k([0.7, 0.7, 0.7, 0.7], method) == 4
+
+
+def test_gap_cuts_at_a_significant_drop():
+    assert adaptive_k([0.9, 0.89, 0.88, 0.3, 0.29], "gap") == 3
+
+
+def test_gap_keeps_all_without_a_significant_drop():
+    # a single drop is the average drop, so it is not significant
+    assert adaptive_k([0.9, 0.5], "gap") == 2
+
+
+def test_gap_ignores_drops_before_min_k():
+    # the largest drop would keep one tool; the remaining drops are not significant
+    assert adaptive_k([0.9, 0.2, 0.19, 0.18], "gap", min_k=2) == 4
+
+
+def test_elbow():
+    assert adaptive_k([0.9, 0.89, 0.88, 0.3, 0.29], "elbow") == 3
+    # a straight line has no knee
+    assert adaptive_k([0.9, 0.8, 0.7, 0.6], "elbow") == 4
+    # too few points for a knee
+    assert adaptive_k([0.9, 0.5], "elbow") == 2
+
+
+def test_ratio():
+    assert adaptive_k([0.9, 0.85, 0.5], "ratio") == 2
+    assert adaptive_k([0.9, 0.85, 0.5], "ratio", ratio=0.5) == 3
+    assert adaptive_k([0.9, 0.1], "ratio", min_k=2) == 2
+    # without a positive top score there is nothing to take a ratio of
+    assert adaptive_k([0.0, 0.0, 0.0], "ratio") == 3
+    assert adaptive_k([-0.1, -0.2], "ratio") == 2
+
+
+def test_select_rejects_unknown_cutoff():
+    memory = ToolMemory(embeddings=HashingEmbeddings())
+    memory.add_tools([("a", {"name": "a"})])
+    with pytest.raises(ValueError):
+        select_tools_for_query("a", tool_memory=memory, cutoff="median")
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+import pytest
+
+from tool_see import HashingEmbeddings, ToolMemory
+from tool_see.utils import embed_utils
+from tool_see.utils.embed_utils import aembed_documents_chunked, embed_documents_chunked
+
+
+class FlakyEmbeddings(HashingEmbeddings):
+    """Fails `failures` times for every chunk holding a text that contains "bad"."""
+
+    def __init__(self, failures=1):
+        super().__init__()
+        self.failures = failures
+        self.calls = []
+        self._failed = {}
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.calls.append(list(texts))
+            key = tuple(texts)
+            if any("bad" in text for text in texts) and self._failed.get(key, 0) < self.failures:
+                self._failed[key] = self._failed.get(key, 0) + 1
+                raise ConnectionError("rate limited")
+        return super().embed_documents(texts)
+
+    async def aembed_documents(self, texts):
+        return self.embed_documents(texts)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    async def asleep(_):
+        pass
+
+    monkeypatch.setattr(embed_utils.time, "sleep", lambda _: None)
+    monkeypatch.setattr(embed_utils.asyncio, "sleep", asleep)
+
+
+TEXTS = ["a", "b", "bad c", "d", "e"]
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_failed_chunk_is_retried_alone(max_workers):
+    embedder = FlakyEmbeddings(failures=2)
+    progress = []
+    results, errors = embed_documents_chunked(
+        embedder,
+        TEXTS,
+        batch_size=2,
+        max_workers=max_workers,
+        max_retries=2,
+        progress_callback=lambda done, total: progress.append((done, total)),
+    )
+    assert errors == []
+    assert results == HashingEmbeddings().embed_documents(TEXTS)
+    # two failures and one success for the bad chunk, one call for each other chunk
+    calls = sorted(map(tuple, embedder.calls))
+    assert calls == [("a", "b"), ("bad c", "d"), ("bad c", "d"), ("bad c", "d"), ("e",)]
+    assert progress[-1] == (5, 5) and len(progress) == 3
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_chunk_failing_after_retries_leaves_the_others(max_workers):
+    embedder = FlakyEmbeddings(failures=3)
+    results, errors = embed_documents_chunked(
+        embedder, TEXTS, batch_size=2, max_workers=max_workers, max_retries=2
+    )
+    assert len(errors) == 1 and isinstance(errors[0], ConnectionError)
+    assert results[2] is None and results[3] is None
+    assert all(results[i] is not None for i in (0, 1, 4))
+
+
+def test_wrong_number_of_embeddings_is_a_failure():
+    class ShortEmbeddings(HashingEmbeddings):
+        def embed_documents(self, texts):
+            return super().embed_documents(texts)[:-1]
+
+    results, errors = embed_documents_chunked(ShortEmbeddings(), TEXTS, max_retries=0)
+    assert results == [None] * 5 and isinstance(errors[0], ValueError)
+    with pytest.raises(ValueError):
+        embed_documents_chunked(ShortEmbeddings(), TEXTS, batch_size=0)
+
+
+def test_async_chunks():
+    results, errors = asyncio.run(
+        aembed_documents_chunked(FlakyEmbeddings(failures=3), TEXTS, batch_size=2)
+    )
+    assert len(errors) == 1 and results[2] is None and results[0] is not None
+    results, errors = asyncio.run(
+        aembed_documents_chunked(FlakyEmbeddings(failures=1), TEXTS, batch_size=2)
+    )
+    assert errors == [] and results == HashingEmbeddings().embed_documents(TEXTS)
+
+
+TOOLS = [(f"t{i}", {"name": f"tool {i}", "description": text}) for i, text in enumerate(TEXTS)]
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_partial_failure_stores_the_other_tools(use_async):
+    embeddings = FlakyEmbeddings(failures=3)
+    memory = ToolMemory(
+        embeddings=embeddings, embed_batch_size=2, embed_max_retries=2, query_cache_size=0
+    )
+    with pytest.raises(RuntimeError):
+        if use_async:
+            asyncio.run(memory.aadd_tools(TOOLS))
+        else:
+            memory.add_tools(TOOLS)
+    assert sorted(memory.get_all_tools()) == ["t0", "t1", "t4"]
+
+    # adding again only embeds the tools that failed
+    embeddings.calls.clear()
+    memory.add_tools(TOOLS)
+    stored = memory.get_all_tools()
+    assert embeddings.calls == [[stored["t2"]["text"], stored["t3"]["text"]]]
+    assert sorted(stored) == ["t0", "t1", "t2", "t3", "t4"]
@@ -0,0 +1,60 @@
+import threading
+
+import pytest
+
+from tool_see import HashingEmbeddings, ToolMemory
+
+
+TOPICS = ["invoice", "customer", "ticket", "branch", "calendar", "bucket", "event", "file"]
+
+
+def tool(i, version=0):
+    # the name repeats the id, so readers can check each result against its metadata
+    return (f"t{i}", {"name": f"t{i}", "description": f"{TOPICS[i % 8]} tool {i} v{version}"})
+
+
+@pytest.mark.parametrize("index", ["exact", "hnsw", "ivf"])
+def test_queries_during_writes(index):
+    memory = ToolMemory(
+        embeddings=HashingEmbeddings(),
+        index=index,
+        index_params={"nlist": 4, "auto_train_size": 50} if index == "ivf" else None,
+        query_cache_size=0,
+    )
+    memory.add_tools([tool(i) for i in range(100)])
+    done = threading.Event()
+    errors = []
+
+    def read():
+        try:
+            while not done.is_set():
+                version = memory.version
+                results = memory.query(f"{TOPICS[version % 8]} tool", top_k=5)
+                assert 0 < len(results) <= 5
+                for tool_id, metadata, score in results:
+                    assert metadata["name"] == tool_id
+                    assert -1.0001 <= score <= 1.0001
+                for batch in memory.query_many(["ticket tool", "file tool 3"], top_k=3):
+                    assert all(metadata["name"] == tool_id for tool_id, metadata, _ in batch)
+                assert memory.version >= version
+        except Exception as e:  # reported by the main thread
+            errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    try:
+        for step in range(1, 30):
+            memory.add_tools([tool(100 + 10 * step + j) for j in range(10)])
+            memory.add_tools([tool(i, step) for i in range(step, 100, 7)])  # re-embedded
+            memory.remove_tools([f"t{100 + 10 * step}"])
+    finally:
+        done.set()
+        for reader in readers:
+            reader.join()
+    assert not errors, errors[0]
+
+    tools = memory.get_all_tools()
+    assert len(tools) == 100 + 29 * 9
+    assert tools["t1"]["metadata"]["description"] == f"{TOPICS[1]} tool 1 v1"
+    assert memory.query(tools["t99"]["text"], top_k=1)[0][0] == "t99"
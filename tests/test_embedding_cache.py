@@ -0,0 +1,91 @@
+from langchain_core.embeddings import Embeddings
+
+from tool_see import HashingEmbeddings, ToolMemory
+
+
+class CountingEmbeddings(Embeddings):
+    """HashingEmbeddings that records the texts sent to `embed_documents`."""
+
+    def __init__(self, model="hashing"):
+        self._inner = HashingEmbeddings()
+        self.model = model
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return self._inner.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self._inner.embed_query(text)
+
+
+class AnonymousEmbeddings(CountingEmbeddings):
+    def __init__(self):
+        super().__init__()
+        del self.model
+
+
+TOOLS = [(f"t{i}", {"name": f"tool {i}", "description": f"does thing {i}"}) for i in range(20)]
+
+
+def test_unchanged_tools_are_not_rewritten(tmp_path):
+    path = tmp_path / "tools.json"
+    embeddings = CountingEmbeddings()
+    memory = ToolMemory(persist_path=str(path), embeddings=embeddings, index="hnsw")
+    memory.add_tools(TOOLS)
+    version, wal = memory.version, (tmp_path / "tools.json.wal").read_bytes()
+    embeddings.embedded.clear()
+
+    memory.add_tools(TOOLS)
+    assert embeddings.embedded == []
+    assert memory.version == version
+    assert memory._matrix.size == 20 and memory._matrix.n_dead == 0
+    assert len(memory._index) == 20
+    assert (tmp_path / "tools.json.wal").read_bytes() == wal
+
+
+def test_only_changed_tools_are_written_and_embedded():
+    embeddings = CountingEmbeddings()
+    memory = ToolMemory(embeddings=embeddings)
+    memory.add_tools(TOOLS)
+    embeddings.embedded.clear()
+
+    changed = dict(TOOLS)
+    changed["t1"] = {"name": "tool 1", "description": "does another thing"}
+    changed["t2"] = {**changed["t2"], "owner": "billing"}  # same embedded text
+    memory.add_tools(list(changed.items()), text_keys=["name", "description"])
+    assert embeddings.embedded == [memory.get_all_tools()["t1"]["text"]]
+    assert memory._matrix.size == 22 and memory._matrix.n_dead == 2
+    assert memory.get_all_tools()["t2"]["metadata"]["owner"] == "billing"
+
+
+def test_embedding_cache_is_shared_across_memories(tmp_path):
+    cache = str(tmp_path / "embeddings.db")
+    ToolMemory(embeddings=CountingEmbeddings(), embedding_cache_path=cache).add_tools(TOOLS)
+    embeddings = CountingEmbeddings()
+    memory = ToolMemory(embeddings=embeddings, embedding_cache_path=cache)
+    memory.add_tools(TOOLS)
+    assert embeddings.embedded == []
+    assert memory.query(memory.get_all_tools()["t3"]["text"], top_k=1)[0][0] == "t3"
+
+
+def test_embedding_cache_is_keyed_by_model(tmp_path):
+    cache = str(tmp_path / "embeddings.db")
+    ToolMemory(embeddings=CountingEmbeddings("a"), embedding_cache_path=cache).add_tools(TOOLS)
+    embeddings = CountingEmbeddings("b")
+    ToolMemory(embeddings=embeddings, embedding_cache_path=cache).add_tools(TOOLS)
+    assert len(embeddings.embedded) == 20
+
+    # an explicit name takes the place of the backend's
+    named = CountingEmbeddings("b")
+    memory = ToolMemory(embeddings=named, embedding_cache_path=cache, embedding_model="a")
+    memory.add_tools(TOOLS)
+    assert named.embedded == []
+
+
+def test_embedding_cache_needs_a_model_name(tmp_path):
+    cache = str(tmp_path / "embeddings.db")
+    ToolMemory(embeddings=AnonymousEmbeddings(), embedding_cache_path=cache).add_tools(TOOLS)
+    embeddings = AnonymousEmbeddings()
+    ToolMemory(embeddings=embeddings, embedding_cache_path=cache).add_tools(TOOLS)
+    assert len(embeddings.embedded) == 20
@@ -0,0 +1,92 @@
+import pytest
+
+from tool_see import HashingEmbeddings, ToolMemory, select_tools_for_query
+
+
+TOOLS = [
+    ("pay", {"name": "pay", "namespace": "billing", "tags": ["invoices", "refunds"]}),
+    ("refund", {"name": "refund", "namespace": "billing", "tags": ["refunds"]}),
+    ("ticket", {"name": "ticket", "namespace": "support", "tags": ["tickets"]}),
+    ("note", {"name": "note", "namespace": "support"}),
+    ("misc", {"name": "misc"}),
+]
+
+
+class CountingEmbeddings(HashingEmbeddings):
+    def __init__(self):
+        super().__init__()
+        self.queries = 0
+
+    def embed_query(self, text):
+        self.queries += 1
+        return super().embed_query(text)
+
+
+def make_memory(index="exact", embeddings=None):
+    memory = ToolMemory(
+        embeddings=embeddings or HashingEmbeddings(),
+        filter_keys=["namespace", "tags"],
+        index=index,
+        query_cache_size=0,
+    )
+    memory.add_tools(TOOLS)
+    return memory
+
+
+def ids(results):
+    return sorted(tool_id for tool_id, _, _ in results)
+
+
+@pytest.mark.parametrize("index", ["exact", "hnsw", "ivf"])
+def test_equality_list_and_any_of(index):
+    memory = make_memory(index)
+    assert ids(memory.query("tool", top_k=5, filters={"namespace": "billing"})) == [
+        "pay",
+        "refund",
+    ]
+    # a value is contained in a list field; a list of values matches any of them
+    assert ids(memory.query("tool", top_k=5, filters={"tags": "refunds"})) == ["pay", "refund"]
+    assert ids(memory.query("tool", top_k=5, filters={"tags": ["invoices", "tickets"]})) == [
+        "pay",
+        "ticket",
+    ]
+    # every filter must match
+    filters = {"namespace": "billing", "tags": "invoices"}
+    assert ids(memory.query("tool", top_k=5, filters=filters)) == ["pay"]
+    batches = memory.query_many(["tool", "refund"], top_k=5, filters={"namespace": "support"})
+    assert [ids(batch) for batch in batches] == [["note", "ticket"], ["note", "ticket"]]
+
+
+def test_removed_and_updated_tools_leave_the_filter():
+    memory = make_memory()
+    memory.remove_tools(["refund"])
+    memory.add_tools([("pay", {"name": "pay", "namespace": "support"})])
+    assert memory.query("tool", top_k=5, filters={"namespace": "billing"}) == []
+    assert ids(memory.query("tool", top_k=5, filters={"namespace": "support"})) == [
+        "note",
+        "pay",
+        "ticket",
+    ]
+
+
+def test_no_match_skips_the_embedding():
+    embeddings = CountingEmbeddings()
+    memory = make_memory(embeddings=embeddings)
+    assert memory.query("tool", filters={"namespace": "hr"}) == []
+    assert embeddings.queries == 0
+
+
+def test_unknown_filter_key_or_missing_filter_keys():
+    with pytest.raises(ValueError):
+        make_memory().query("tool", filters={"owner": "me"})
+    memory = ToolMemory(embeddings=HashingEmbeddings())
+    memory.add_tools(TOOLS)
+    with pytest.raises(ValueError):
+        memory.query("tool", filters={"namespace": "billing"})
+
+
+def test_select_passes_filters():
+    selected = select_tools_for_query(
+        "tool", top_k=5, tool_memory=make_memory(), filters={"namespace": "support"}
+    )
+    assert sorted(tool["_tool_id"] for tool in selected) == ["note", "ticket"]
@@ -0,0 +1,121 @@
+import pytest
+
+from tool_see import HashingEmbeddings, ToolMemory, select_tools_for_query
+from tool_see.utils.lexical_utils import BM25Index, tokenize
+
+
+TOOLS = [
+    ("rebase", {"name": "git_rebase", "description": "replay commits onto another branch"}),
+    ("merge", {"name": "git_merge", "description": "join two branches together"}),
+    ("put", {"name": "s3_put_object", "description": "upload a file to a bucket"}),
+    ("get", {"name": "s3_get_object", "description": "download a file from a bucket"}),
+    ("mail", {"name": "send_email", "description": "send a message to a recipient"}),
+]
+
+
+class CountingEmbeddings(HashingEmbeddings):
+    def __init__(self):
+        super().__init__()
+        self.queries = 0
+
+    def embed_query(self, text):
+        self.queries += 1
+        return super().embed_query(text)
+
+
+def make_memory(embeddings=None, **kwargs):
+    memory = ToolMemory(
+        embeddings=embeddings or HashingEmbeddings(),
+        lexical_index=True,
+        query_cache_size=0,
+        **kwargs,
+    )
+    memory.add_tools(TOOLS)
+    return memory
+
+
+def test_tokenize_keeps_identifiers_and_their_parts():
+    assert tokenize("Call s3_put_object now") == [
+        "call",
+        "s3_put_object",
+        "s3",
+        "put",
+        "object",
+        "now",
+    ]
+    assert tokenize(None) == []
+
+
+def test_bm25_prefers_rare_terms_and_ignores_unseen_rows():
+    index = BM25Index()
+    index.add([0, 1, 2], ["red apple", "green apple", "red red car"])
+    scores = index.scores("red car", 3)
+    assert scores[2] > scores[0] > scores[1] == 0
+    # a reader holding a snapshot of two rows never sees the third
+    assert index.scores("car", 2).tolist() == [0.0, 0.0]
+
+
+def test_lexical_mode_matches_exact_names_without_embedding():
+    embeddings = CountingEmbeddings()
+    memory = make_memory(embeddings)
+    results = memory.query("git_rebase", top_k=3, mode="lexical")
+    assert results[0][0] == "rebase"
+    # only tools sharing a term with the query are returned
+    assert [tool_id for tool_id, _, _ in results] == ["rebase", "merge"]
+    assert memory.query("kubernetes", mode="lexical") == []
+    assert embeddings.queries == 0
+
+
+def test_lexical_mode_skips_removed_and_updated_tools():
+    memory = make_memory()
+    memory.remove_tools(["put"])
+    memory.add_tools([("get", {"name": "fetch", "description": "read a value"})])
+    assert memory.query("s3 object", top_k=5, mode="lexical") == []
+    assert memory.query("fetch", top_k=5, mode="lexical")[0][0] == "get"
+
+
+def test_hybrid_rrf_scores():
+    memory = make_memory(rrf_k=10)
+    results = memory.query("git_rebase", top_k=5, mode="hybrid")
+    assert results[0][0] == "rebase"
+    # first in both rankings
+    assert results[0][2] == pytest.approx(2 / 11)
+    assert all(score <= 2 / 11 + 1e-6 for _, _, score in results)
+
+
+def test_hybrid_weighted_scores():
+    dense = make_memory().query("git_rebase", top_k=1)[0]
+    weighted = make_memory(fusion="weighted", fusion_alpha=0.25)
+    results = weighted.query("git_rebase", top_k=5, mode="hybrid")
+    assert results[0][0] == dense[0] == "rebase"
+    # the best BM25 score is normalized to 1
+    assert results[0][2] == pytest.approx(0.25 * dense[2] + 0.75, abs=1e-5)
+
+
+def test_modes_in_batches_and_selection():
+    memory = make_memory()
+    batches = memory.query_many(["git_merge", "s3_get_object"], top_k=1, mode="lexical")
+    assert [batch[0][0] for batch in batches] == ["merge", "get"]
+    batches = memory.query_many(["git_merge", "s3_get_object"], top_k=1, mode="hybrid")
+    assert [batch[0][0] for batch in batches] == ["merge", "get"]
+    selected = select_tools_for_query("send_email", top_k=1, tool_memory=memory, mode="lexical")
+    assert selected[0]["_tool_id"] == "mail"
+
+
+def test_lexical_index_survives_reload(tmp_path):
+    path = str(tmp_path / "tools.json")
+    make_memory(persist_path=path).save()
+    reloaded = ToolMemory(persist_path=path, embeddings=HashingEmbeddings(), lexical_index=True)
+    assert reloaded.query("s3_put_object", top_k=1, mode="lexical")[0][0] == "put"
+
+
+def test_invalid_modes():
+    memory = ToolMemory(embeddings=HashingEmbeddings())
+    memory.add_tools(TOOLS)
+    for mode in ("lexical", "hybrid"):
+        with pytest.raises(ValueError):
+            memory.query("git_rebase", mode=mode)
+    with pytest.raises(ValueError):
+        make_memory().query("git_rebase", mode="sparse")
+    with pytest.raises(ValueError):
+        ToolMemory(embeddings=HashingEmbeddings(), fusion="max")
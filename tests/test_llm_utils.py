@@ -0,0 +1,86 @@
+import os
+import subprocess
+import sys
+
+import dotenv
+import pytest
+
+import tool_see
+from tool_see import HashingEmbeddings, ToolMemory
+from tool_see.utils import llm_utils
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients(monkeypatch):
+    """Unconfigured llm_utils state, with .env loading recorded instead of done."""
+    loads = []
+    monkeypatch.setattr(dotenv, "load_dotenv", lambda: loads.append(True))
+    monkeypatch.setattr(llm_utils, "_overrides", {})
+    monkeypatch.setattr(llm_utils, "_env_loaded", False)
+    monkeypatch.setattr(llm_utils, "_llm", None)
+    monkeypatch.setattr(llm_utils, "_embeddings", None)
+    for env in ("OPENAI_MODEL", "EMBED_MODEL", "EMBED_API_KEY", "EMBED_API_BASE"):
+        monkeypatch.delenv(env, raising=False)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    return loads
+
+
+def test_import_has_no_side_effects(tmp_path):
+    (tmp_path / ".env").write_text("EMBED_MODEL=from-dotenv\n")
+    code = (
+        "import os, tool_see\n"
+        "from tool_see.utils import llm_utils\n"
+        "assert llm_utils._llm is None and llm_utils._embeddings is None\n"
+        "assert not llm_utils._env_loaded and 'EMBED_MODEL' not in os.environ\n"
+    )
+    env = {"PYTHONPATH": os.path.dirname(os.path.dirname(tool_see.__file__))}
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, check=True)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [".env"]
+
+
+def test_configure_rejects_unknown_settings():
+    with pytest.raises(TypeError):
+        llm_utils.configure(embed_modle="x")
+    assert llm_utils._overrides == {}
+
+
+def test_configured_embeddings_are_used(fresh_clients):
+    embeddings = HashingEmbeddings()
+    llm_utils.configure(embeddings=embeddings)
+    assert llm_utils.get_embeddings() is embeddings
+    assert ToolMemory().embeddings is embeddings
+    assert llm_utils.embeddings is embeddings
+    assert fresh_clients == []
+
+
+def test_settings_override_the_environment(monkeypatch, fresh_clients):
+    monkeypatch.setenv("EMBED_MODEL", "env-model")
+    monkeypatch.setenv("EMBED_API_KEY", "key")
+    first = llm_utils.get_embeddings()
+    assert first.model == "env-model" and llm_utils.get_embeddings() is first
+    assert fresh_clients == [True]
+
+    # changing a setting discards the built client; unrelated settings keep it
+    llm_utils.configure(model="chat")
+    assert llm_utils.get_embeddings() is first
+    llm_utils.configure(embed_model="override", embed_api_base="http://localhost:1/v1")
+    second = llm_utils.get_embeddings()
+    assert second is not first and second.model == "override"
+    assert str(second.embedding_client.base_url).startswith("http://localhost:1/v1")
+    assert fresh_clients == [True]
+
+
+def test_llm_cache_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    llm_utils.configure(model="chat", llm_cache_path=None)
+    llm = llm_utils.get_llm()
+    assert llm.model_name == "chat" and llm.cache is None and llm_utils.get_llm() is llm
+
+    llm_utils.configure(llm_cache_path=str(tmp_path / "cache.db"))
+    assert llm_utils.get_llm() is not llm and llm_utils.get_llm().cache is not None
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["cache.db"]
+
+
+def test_unknown_attribute():
+    with pytest.raises(AttributeError):
+        llm_utils.chat_model
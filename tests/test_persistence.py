@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+from tool_see import HashingEmbeddings, ToolMemory
+
+
+FORMATS = ["json", "binary"]
+# small enough parameters that the IVF and PQ indexes are trained on the test catalog
+INDEXES = {
+    "exact": None,
+    "hnsw": {"M": 8, "ef_construction": 50},
+    "ivf": {"nlist": 4, "nprobe": 4, "auto_train_size": 20},
+    "pq": {"m": 8, "nbits": 4, "auto_train_size": 20},
+}
+VERBS = ["get", "list", "create", "delete", "sync"]
+NOUNS = ["invoice", "customer", "ticket", "branch", "calendar", "bucket", "event", "file"]
+
+
+def make_tools(n):
+    return [
+        (
+            f"t{i}",
+            {
+                "name": f"{VERBS[i % len(VERBS)]}_{NOUNS[i % len(NOUNS)]}_{i}",
+                "description": f"{VERBS[i % len(VERBS)]} {NOUNS[i % len(NOUNS)]} records {i}",
+            },
+        )
+        for i in range(n)
+    ]
+
+
+def open_memory(tmp_path, storage_format, index):
+    path = tmp_path / ("store" if storage_format == "binary" else "tools.json")
+    return ToolMemory(
+        persist_path=str(path),
+        storage_format=storage_format,
+        compact_threshold=None,
+        index=index,
+        index_params=INDEXES[index],
+        embeddings=HashingEmbeddings(),
+    )
+
+
+def top(memory, tool_id):
+    """Best match for the embedded text of `tool_id`."""
+    return memory.query(memory.get_all_tools()[tool_id]["text"], top_k=1)[0]
+
+
+def assert_same_tools(memory, other):
+    tools, others = memory.get_all_tools(), other.get_all_tools()
+    assert sorted(tools) == sorted(others)
+    for tool_id, tool in tools.items():
+        assert others[tool_id]["metadata"] == tool["metadata"]
+        assert np.allclose(others[tool_id]["embedding"], tool["embedding"], atol=1e-6)
+
+
+@pytest.mark.parametrize("index", INDEXES)
+@pytest.mark.parametrize("storage_format", FORMATS)
+def test_snapshot_round_trip(tmp_path, storage_format, index):
+    memory = open_memory(tmp_path, storage_format, index)
+    memory.add_tools(make_tools(40))
+    memory.save()
+
+    reloaded = open_memory(tmp_path, storage_format, index)
+    assert_same_tools(memory, reloaded)
+    for tool_id in ["t0", "t17", "t39"]:
+        found, _, score = top(reloaded, tool_id)
+        assert found == tool_id and score == pytest.approx(1.0, abs=1e-4)
+
+
+@pytest.mark.parametrize("snapshot", [False, True])
+@pytest.mark.parametrize("index", INDEXES)
+@pytest.mark.parametrize("storage_format", FORMATS)
+def test_remove_and_update_survive_reload(tmp_path, storage_format, index, snapshot):
+    memory = open_memory(tmp_path, storage_format, index)
+    memory.add_tools(make_tools(40))
+    memory.save()
+    assert memory.remove_tools(["t3", "t4", "missing"]) == 2
+    memory.update_tools([("t5", {"description": "archive closed support tickets"})])
+    memory.add_tools([("new", {"name": "new", "description": "rotate api keys"})])
+    if snapshot:
+        memory.save()  # otherwise the changes are replayed from the write-ahead log
+
+    reloaded = open_memory(tmp_path, storage_format, index)
+    assert_same_tools(memory, reloaded)
+    tools = reloaded.get_all_tools()
+    assert "t3" not in tools and "t4" not in tools
+    assert tools["t5"]["metadata"]["description"] == "archive closed support tickets"
+    assert top(reloaded, "t5")[0] == "t5"
+    assert top(reloaded, "new")[0] == "new"
+    assert all(r[0] not in ("t3", "t4") for r in reloaded.query("get ticket", top_k=40))
+
+
+@pytest.mark.parametrize("storage_format", FORMATS)
+def test_clear_survives_reload(tmp_path, storage_format):
+    memory = open_memory(tmp_path, storage_format, "hnsw")
+    memory.add_tools(make_tools(10))
+    memory.save()
+    memory.clear()
+    assert open_memory(tmp_path, storage_format, "hnsw").get_all_tools() == {}
+
+    memory.add_tools(make_tools(3))
+    reloaded = open_memory(tmp_path, storage_format, "hnsw")
+    assert sorted(reloaded.get_all_tools()) == ["t0", "t1", "t2"]
+
+
+@pytest.mark.parametrize("storage_format", FORMATS)
+def test_index_of_another_kind_is_rebuilt(tmp_path, storage_format):
+    memory = open_memory(tmp_path, storage_format, "hnsw")
+    memory.add_tools(make_tools(40))
+    memory.save()
+
+    reloaded = open_memory(tmp_path, storage_format, "ivf")
+    assert reloaded._index.kind == "ivf" and len(reloaded._index) == 40
+    assert top(reloaded, "t7")[0] == "t7"
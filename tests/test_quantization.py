@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from tool_see import HashingEmbeddings, ToolMemory
+
+
+TOOLS = [
+    (f"t{i}", {"name": f"tool {i}", "description": f"handles {w} number {i}"})
+    for i, w in enumerate(["invoices", "tickets", "branches", "buckets", "events"] * 20)
+]
+QUERIES = ["handles tickets", "tool 42", "number 7 events", "buckets 13"]
+
+
+def make_memory(**kwargs):
+    memory = ToolMemory(embeddings=HashingEmbeddings(), **kwargs)
+    memory.add_tools(TOOLS)
+    return memory
+
+
+@pytest.mark.parametrize("quantization", ["int8", "float16"])
+def test_rescored_results_match_exact_scores(quantization):
+    exact = make_memory()
+    quantized = make_memory(quantization=quantization)
+    for query in QUERIES:
+        expected = exact.query(query, top_k=5)
+        results = quantized.query(query, top_k=5)
+        # ids can differ among tied scores, the scores cannot
+        assert [r[2] for r in results] == pytest.approx([r[2] for r in expected], abs=1e-6)
+        exact_scores = {tid: score for tid, _, score in exact.query(query, top_k=100)}
+        assert all(score == pytest.approx(exact_scores[tid]) for tid, _, score in results)
+
+
+@pytest.mark.parametrize("quantization", ["int8", "float16"])
+def test_scores_without_rescoring_are_approximate(quantization):
+    quantized = make_memory(quantization=quantization, rescore_factor=0)
+    tools = quantized.get_all_tools()
+    for tool_id in ["t0", "t42", "t99"]:
+        found, _, score = quantized.query(tools[tool_id]["text"], top_k=1)[0]
+        assert found == tool_id
+        assert score == pytest.approx(1.0, abs=0.02)
+
+
+def test_codes_are_smaller_than_the_float32_rows():
+    memory = make_memory(quantization="int8")
+    assert memory._quantized.nbytes * 4 == memory._matrix.vectors.nbytes
+
+
+def test_float32_rows_are_not_resident_by_default():
+    memory = make_memory(quantization="int8")
+    assert isinstance(memory._matrix._data, np.memmap)
+    assert memory.query("tool 42", top_k=1)[0][0] == "t42"
+    memory.remove_tools([f"t{i}" for i in range(60)])  # purges the tombstones
+    assert isinstance(memory._matrix._data, np.memmap)
+    assert memory.query("tool 72", top_k=1)[0][0] == "t72"
+
+    resident = make_memory(quantization="int8", resident_vectors=True)
+    assert not isinstance(resident._matrix._data, np.memmap)
+
+
+def test_binary_store_round_trip(tmp_path):
+    path = str(tmp_path / "store")
+    memory = make_memory(quantization="int8", persist_path=path, storage_format="binary")
+    memory.save()
+    memory.add_tools([("new", {"name": "rotate api keys"})])
+    reloaded = ToolMemory(
+        embeddings=HashingEmbeddings(),
+        quantization="int8",
+        persist_path=path,
+        storage_format="binary",
+    )
+    assert len(reloaded._quantized) == 101
+    assert reloaded.query("rotate api keys", top_k=1)[0][0] == "new"
+    assert reloaded.query("tool 42", top_k=1)[0][0] == "t42"
+
+
+def test_training_an_empty_store():
+    memory = ToolMemory(quantization="int8", embeddings=HashingEmbeddings())
+    memory.train_index()
+    memory.add_tools(TOOLS[:3])
+    assert memory.query("tool 1", top_k=1)[0][0] == "t1"
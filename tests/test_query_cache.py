@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from tool_see import HashingEmbeddings, ToolMemory
+from tool_see.utils import cache_utils
+from tool_see.utils.cache_utils import LRUCache
+
+
+class CountingEmbeddings(HashingEmbeddings):
+    """HashingEmbeddings that records each embedding request."""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    def embed_query(self, text):
+        self.requests.append([text])
+        return super().embed_query(text)
+
+    def embed_documents(self, texts):
+        self.requests.append(list(texts))
+        return super().embed_documents(texts)
+
+
+def make_memory(**kwargs):
+    embeddings = CountingEmbeddings()
+    memory = ToolMemory(embeddings=embeddings, **kwargs)
+    memory.add_tools([(f"t{i}", {"name": f"tool {i}"}) for i in range(5)])
+    embeddings.requests.clear()
+    return memory, embeddings
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 1
+    with pytest.raises(ValueError):
+        LRUCache(maxsize=0)
+
+
+def test_lru_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache_utils.time, "monotonic", lambda: now[0])
+    cache = LRUCache(maxsize=2, ttl=10)
+    cache.put("a", 1)
+    now[0] = 109.0
+    assert cache.get("a") == 1
+    now[0] = 110.0
+    assert cache.get("a") is None and len(cache) == 0
+
+
+def test_repeated_queries_are_embedded_once():
+    memory, embeddings = make_memory()
+    first = memory.query("List  tool 3", top_k=1)
+    # normalized: case-folded, whitespace collapsed
+    assert memory.query(" list tool 3 ", top_k=1) == first
+    assert asyncio.run(memory.aquery("LIST TOOL 3", top_k=1)) == first
+    assert embeddings.requests == [["List  tool 3"]]
+    assert memory.query_cache.stats()["hits"] == 2
+
+
+def test_batch_embeds_only_the_misses_in_one_request():
+    memory, embeddings = make_memory()
+    memory.query("tool 1")
+    memory.query_many(["tool 1", "tool 2", "tool 3"])
+    assert embeddings.requests == [["tool 1"], ["tool 2", "tool 3"]]
+    memory.query_many(["tool 2", "tool 3"])
+    assert len(embeddings.requests) == 2
+
+
+def test_keys_include_the_embedding_model():
+    memory, embeddings = make_memory(embedding_model="a")
+    memory.query("tool 1")
+    memory.embedding_model = "b"
+    memory.query("tool 1")
+    assert len(embeddings.requests) == 2
+
+
+def test_query_cache_can_be_disabled():
+    memory, embeddings = make_memory(query_cache_size=0)
+    assert memory.query_cache is None
+    memory.query("tool 1")
+    memory.query("tool 1")
+    assert len(embeddings.requests) == 2
+
+
+def test_query_cache_ttl(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(cache_utils.time, "monotonic", lambda: now[0])
+    memory, embeddings = make_memory(query_cache_ttl=60)
+    memory.query("tool 1")
+    now[0] = 59.0
+    memory.query("tool 1")
+    now[0] = 61.0
+    memory.query("tool 1")
+    assert len(embeddings.requests) == 2
@@ -0,0 +1,71 @@
+import json
+
+from tool_see import HashingEmbeddings, ToolMemory, ToolRegistry
+from tool_see.utils.registry_utils import function_path
+from tool_see.utils.tool_utils import create_tool
+
+
+def shout(text: str) -> str:
+    """Upper-case `text`."""
+    return text.upper()
+
+
+def test_import_paths_need_an_allowed_module():
+    registry = ToolRegistry()
+    assert registry.resolve("os:system") is None
+    assert registry.resolve("json:dumps") is None
+
+    registry = ToolRegistry(allowed_modules=["json"])
+    assert registry.resolve("json:dumps") is json.dumps
+    assert registry.resolve("json.decoder:JSONDecoder") is json.decoder.JSONDecoder
+    assert registry.resolve("jsonschema_like:validate") is None  # not a submodule
+    assert registry.resolve("os:system") is None
+
+    registry.allow_modules("os")
+    assert callable(registry.resolve("os:system"))
+
+
+def test_registered_keys_resolve_without_an_allowlist():
+    registry = ToolRegistry()
+
+    @registry.register("greet")
+    def greet(name: str) -> str:
+        """Greet `name`."""
+        return f"hi {name}"
+
+    assert registry.resolve("greet") is greet
+    registry.unregister("greet")
+    assert registry.resolve("greet") is None
+
+
+def test_stored_metadata_keeps_references_only():
+    registry = ToolRegistry()
+    local = lambda text: text  # noqa: E731
+    stored = registry.split_metadata("shout", {"name": "shout", "function": shout})
+    assert stored == {"name": "shout", "function_ref": function_path(shout)}
+    assert registry.split_metadata("echo", {"function": local}) == {"function_ref": "echo"}
+    # callables handed over in this process resolve without allowing their module
+    assert registry.resolve(stored["function_ref"]) is shout
+    assert registry.resolve("echo") is local
+
+
+def test_tools_resolve_through_the_memory_registry():
+    registry = ToolRegistry()
+    memory = ToolMemory(embeddings=HashingEmbeddings(), registry=registry)
+
+    def nested(text: str) -> str:
+        """Reverse `text`."""
+        return text[::-1]
+
+    memory.add_tools(
+        [
+            ("nested", {"name": "nested", "description": "reverse", "function": nested}),
+            ("shell", {"name": "shell", "description": "run", "function": "os:system"}),
+        ]
+    )
+    tools = memory.get_all_tools()
+    metadata = tools["nested"]["metadata"]
+    assert "function" not in metadata and metadata["function_ref"] == "nested"
+    assert create_tool(metadata, registry=memory.registry).invoke({"text": "abc"}) == "cba"
+    # a stored import path outside the allowed modules never becomes a tool
+    assert create_tool(tools["shell"]["metadata"], registry=memory.registry) is None
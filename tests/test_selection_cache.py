@@ -0,0 +1,93 @@
+import asyncio
+
+from tool_see import (
+    HashingEmbeddings,
+    SelectionCache,
+    ToolMemory,
+    aselect_tools_for_query,
+    select_tools_for_query,
+    select_tools_for_query_batch,
+)
+
+
+TOOLS = [
+    (f"t{i}", {"name": f"tool {i}", "description": f"manage {w}"})
+    for i, w in enumerate(["invoices", "tickets", "branches", "buckets"])
+]
+
+
+class CountingMemory(ToolMemory):
+    """ToolMemory counting the searches that reach it."""
+
+    searches = 0
+
+    def query(self, *args, **kwargs):
+        self.searches += 1
+        return super().query(*args, **kwargs)
+
+    async def aquery(self, *args, **kwargs):
+        self.searches += 1
+        return await super().aquery(*args, **kwargs)
+
+    def query_many(self, queries, *args, **kwargs):
+        self.searches += len(queries)
+        return super().query_many(queries, *args, **kwargs)
+
+
+def make_memory():
+    memory = CountingMemory(embeddings=HashingEmbeddings())
+    memory.add_tools(TOOLS)
+    return memory
+
+
+def ids(selected):
+    return [match.tool_id for match in selected]
+
+
+def test_repeated_queries_are_served_from_the_cache():
+    memory, cache = make_memory(), SelectionCache()
+    first = select_tools_for_query("manage tickets", tool_memory=memory, top_k=2, cache=cache)
+    again = select_tools_for_query("  Manage TICKETS ", tool_memory=memory, top_k=2, cache=cache)
+    assert ids(again) == ids(first) and memory.searches == 1
+    assert cache.stats()["hits"] == 1
+
+    # other selection parameters are other entries
+    select_tools_for_query("manage tickets", tool_memory=memory, top_k=3, cache=cache)
+    select_tools_for_query("manage tickets", tool_memory=memory, top_k=2, cutoff="gap", cache=cache)
+    assert memory.searches == 3
+
+
+def test_changes_to_the_memory_invalidate_the_cache():
+    memory, cache = make_memory(), SelectionCache()
+    select_tools_for_query("manage tickets", tool_memory=memory, top_k=1, cache=cache)
+    memory.add_tools([("new", {"name": "tickets", "description": "manage tickets"})])
+    selected = select_tools_for_query("manage tickets", tool_memory=memory, top_k=1, cache=cache)
+    assert ids(selected) == ["new"] and memory.searches == 2
+
+
+def test_cached_results_are_copies():
+    memory, cache = make_memory(), SelectionCache()
+    select_tools_for_query("manage tickets", tool_memory=memory, top_k=2, cache=cache).clear()
+    again = select_tools_for_query("manage tickets", tool_memory=memory, top_k=2, cache=cache)
+    assert len(again) == 2
+
+
+def test_batch_searches_each_distinct_query_once():
+    memory, cache = make_memory(), SelectionCache()
+    select_tools_for_query("manage buckets", tool_memory=memory, top_k=1, cache=cache)
+    queries = ["manage buckets", "manage tickets", "Manage tickets", "manage invoices"]
+    selected = select_tools_for_query_batch(queries, tool_memory=memory, top_k=1, cache=cache)
+    assert [ids(s) for s in selected] == [["t3"], ["t1"], ["t1"], ["t0"]]
+    assert memory.searches == 3  # one single query, then two distinct misses
+
+    uncached = select_tools_for_query_batch(queries, tool_memory=memory, top_k=1)
+    assert [ids(s) for s in uncached] == [ids(s) for s in selected]
+
+
+def test_async_selection_shares_the_cache():
+    memory, cache = make_memory(), SelectionCache()
+    selected = asyncio.run(
+        aselect_tools_for_query("manage branches", tool_memory=memory, top_k=1, cache=cache)
+    )
+    again = select_tools_for_query("manage branches", tool_memory=memory, top_k=1, cache=cache)
+    assert ids(selected) == ids(again) == ["t2"] and memory.searches == 1
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from tool_see import HashingEmbeddings, ToolMemory
+from tool_see.utils.cache_utils import SemanticCache
+
+
+def unit(*values):
+    vec = np.array(values, dtype=np.float32)
+    return vec / np.linalg.norm(vec)
+
+
+def make_memory(**kwargs):
+    memory = ToolMemory(
+        embeddings=HashingEmbeddings(),
+        query_cache_size=0,
+        semantic_cache_size=8,
+        semantic_cache_threshold=0.9,
+        **kwargs,
+    )
+    memory.add_tools([(f"t{i}", {"name": f"list files {i}"}) for i in range(5)])
+    return memory
+
+
+def test_similar_queries_hit():
+    cache = SemanticCache(maxsize=4, threshold=0.9)
+    cache.put(unit(1, 0, 0), "p", 1, "a")
+    assert cache.get(unit(1, 0.1, 0), "p", 1) == "a"
+    assert cache.get(unit(1, 1, 0), "p", 1) is None
+    # same query, other search parameters
+    assert cache.get(unit(1, 0, 0), "q", 1) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+    with pytest.raises(ValueError):
+        SemanticCache(maxsize=0)
+
+
+def test_new_version_empties_the_cache():
+    cache = SemanticCache(maxsize=4)
+    cache.put(unit(1, 0), "p", 1, "a")
+    assert cache.get(unit(1, 0), "p", 2) is None and len(cache) == 0
+    # results computed on an older catalog are not stored
+    cache.put(unit(1, 0), "p", 1, "a")
+    assert cache.get(unit(1, 0), "p", 2) is None
+
+
+def test_least_recently_used_slot_is_recycled():
+    cache = SemanticCache(maxsize=2, threshold=0.99)
+    cache.put(unit(1, 0, 0), "p", 1, "a")
+    cache.put(unit(0, 1, 0), "p", 1, "b")
+    assert cache.get(unit(1, 0, 0), "p", 1) == "a"
+    cache.put(unit(0, 0, 1), "p", 1, "c")
+    assert cache.get(unit(0, 1, 0), "p", 1) is None
+    assert cache.get(unit(1, 0, 0), "p", 1) == "a"
+    assert cache.get(unit(0, 0, 1), "p", 1) == "c"
+    assert cache.evictions == 1
+
+
+def test_memory_reuses_results_of_near_duplicate_queries():
+    memory = make_memory()
+    first = memory.query("list files 3")
+    # punctuation and case change the text but not its embedding
+    assert memory.query("List files 3?") == first
+    assert memory.semantic_cache.hits == 1
+    # other top_k or filters are cached separately
+    assert len(memory.query("List files 3?", top_k=1)) == 1
+    assert memory.semantic_cache.hits == 1
+
+
+def test_catalog_changes_invalidate_results():
+    memory = make_memory()
+    assert "new" not in [r[0] for r in memory.query("list files 3")]
+    memory.add_tools([("new", {"name": "list files 3"})])
+    assert "new" in [r[0] for r in memory.query("list files 3")]
+    memory.remove_tools(["new"])
+    assert "new" not in [r[0] for r in memory.query("list files 3")]
+    assert memory.semantic_cache.hits == 0
+
+
+def test_lexical_queries_are_not_cached():
+    memory = make_memory(lexical_index=True)
+    memory.query("list files 3", mode="lexical")
+    memory.query("list files 3", mode="lexical")
+    memory.query("list files 3", mode="hybrid")
+    memory.query("list files 3", mode="hybrid")
+    assert memory.semantic_cache.hits == 0 and memory.semantic_cache.misses == 0
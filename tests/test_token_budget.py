@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from tool_see import HashingEmbeddings, ToolMemory, select_tools_for_query
+from tool_see.utils import tool_utils
+from tool_see.utils.token_utils import tool_token_cost
+
+
+def make_memory(**kwargs):
+    memory = ToolMemory(embeddings=HashingEmbeddings(), **kwargs)
+    memory.add_tools(
+        [
+            ("small", {"name": "send email", "description": "send an email"}),
+            ("large", {"name": "send email bulk", "description": "send email " + "x" * 400}),
+            ("medium", {"name": "send email draft", "description": "send email " + "y" * 80}),
+        ]
+    )
+    return memory
+
+
+def no_counting(monkeypatch):
+    def fail(metadata):
+        raise AssertionError("token costs must not be counted here")
+
+    monkeypatch.setattr(tool_utils, "tool_token_cost", fail)
+
+
+def test_costs_are_counted_at_ingestion(monkeypatch):
+    memory = make_memory()
+    stored = memory.get_all_tools()
+    no_counting(monkeypatch)
+    costs = memory.token_costs(["small", "large", "unknown"])
+    assert costs == [
+        tool_token_cost(stored["small"]["metadata"]),
+        tool_token_cost(stored["large"]["metadata"]),
+        None,
+    ]
+
+
+def test_budget_packs_best_tools_that_fit(monkeypatch):
+    memory = make_memory()
+    no_counting(monkeypatch)  # budgets only read the stored costs
+    ids = ["small", "large", "medium"]
+    costs = dict(zip(ids, memory.token_costs(ids)))
+    budget = costs["small"] + costs["medium"]
+    selected = select_tools_for_query(
+        "send email", tool_memory=memory, top_k=3, token_budget=budget
+    )
+    assert {m.tool_id for m in selected} == {"small", "medium"}
+    assert sum(costs[m.tool_id] for m in selected) <= budget
+    assert select_tools_for_query("send email", tool_memory=memory, token_budget=1) == []
+
+
+@pytest.mark.parametrize("snapshot", [False, True])
+def test_costs_are_persisted(tmp_path, monkeypatch, snapshot):
+    path = str(tmp_path / "tools.json")
+    memory = make_memory(persist_path=path, compact_threshold=None)
+    if snapshot:
+        memory.save()
+    expected = memory.token_costs(["small", "large"])
+    no_counting(monkeypatch)
+    reloaded = ToolMemory(persist_path=path, embeddings=HashingEmbeddings())
+    assert reloaded.token_costs(["small", "large"]) == expected
+
+
+def test_stores_saved_without_costs_are_counted_on_load(tmp_path):
+    path = tmp_path / "tools.json"
+    memory = make_memory(persist_path=str(path))
+    memory.save()
+    expected = memory.token_costs(["small", "large", "medium"])
+    data = json.loads(path.read_text())
+    for entry in data.values():
+        del entry["tokens"]
+    path.write_text(json.dumps(data))
+    reloaded = ToolMemory(persist_path=str(path), embeddings=HashingEmbeddings())
+    assert reloaded.token_costs(["small", "large", "medium"]) == expected
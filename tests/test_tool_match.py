@@ -0,0 +1,57 @@
+import json
+import pickle
+
+import pytest
+
+from tool_see import HashingEmbeddings, ToolMatch, ToolMemory, select_tools_for_query
+
+
+METADATA = {"name": "send_email", "description": "send a message"}
+
+
+def test_maps_like_the_metadata_plus_id_and_score():
+    match = ToolMatch("mail", 0.5, METADATA)
+    assert match["_tool_id"] == "mail" and match["_score"] == 0.5
+    assert match["name"] == "send_email" and match.get("missing") is None
+    assert list(match) == ["name", "description", "_tool_id", "_score"]
+    assert len(match) == 4 and "_score" in match and "missing" not in match
+    assert dict(match) == {**METADATA, "_tool_id": "mail", "_score": 0.5}
+    assert match == dict(match)
+    assert json.loads(json.dumps(dict(match))) == dict(match)
+    with pytest.raises(KeyError):
+        match["missing"]
+
+
+def test_id_and_score_override_metadata_keys():
+    match = ToolMatch("mail", 0.5, {**METADATA, "_score": "stored"})
+    assert match["_score"] == 0.5 and len(match) == 4
+    assert list(match).count("_score") == 1
+
+
+def test_empty_metadata():
+    assert dict(ToolMatch("mail", 0.5, None)) == {"_tool_id": "mail", "_score": 0.5}
+
+
+def test_read_only_and_shares_the_metadata():
+    match = ToolMatch("mail", 0.5, METADATA)
+    assert match.metadata is METADATA
+    with pytest.raises(AttributeError):
+        match.score = 1.0
+    with pytest.raises(TypeError):
+        match["name"] = "other"
+    copy = dict(match)
+    copy["name"] = "other"
+    assert METADATA["name"] == "send_email"
+
+
+def test_pickle_round_trip():
+    match = pickle.loads(pickle.dumps(ToolMatch("mail", 0.5, METADATA)))
+    assert (match.tool_id, match.score, match.metadata) == ("mail", 0.5, METADATA)
+
+
+def test_selected_tools_share_the_stored_metadata():
+    memory = ToolMemory(embeddings=HashingEmbeddings())
+    memory.add_tools([("mail", METADATA)])
+    selected = select_tools_for_query("send_email", top_k=1, tool_memory=memory)
+    assert isinstance(selected[0], ToolMatch) and selected[0]["_tool_id"] == "mail"
+    assert selected[0].metadata is memory.get_all_tools()["mail"]["metadata"]
@@ -1,4 +1,27 @@
+from tool_see.utils.embed_utils import HashingEmbeddings
+from tool_see.utils.registry_utils import (
+    ToolRegistry,
+    allow_tool_modules,
+    register_tool_function,
+)
 from tool_see.utils.tool_utils import ToolMemory
-from tool_see.tool_searcher import select_tools_for_query
+from tool_see.tool_searcher import (
+    SelectionCache,
+    ToolMatch,
+    aselect_tools_for_query,
+    select_tools_for_query,
+    select_tools_for_query_batch,
+)
 
-__all__ = ["ToolMemory", "select_tools_for_query"]
+__all__ = [
+    "HashingEmbeddings",
+    "SelectionCache",
+    "ToolMatch",
+    "ToolMemory",
+    "ToolRegistry",
+    "allow_tool_modules",
+    "aselect_tools_for_query",
+    "register_tool_function",
+    "select_tools_for_query",
+    "select_tools_for_query_batch",
+]
@@ -3,7 +3,7 @@ Automated tool-agent workflow for ToolSEE.
 """
 
 import logging
-from typing import Any, Callable, List
+from typing import Any, Callable, Dict, List, Optional
 from typing_extensions import TypedDict
 
 from langchain.agents import create_agent
@@ -15,8 +15,8 @@ from langgraph.prebuilt.tool_node import (
     _get_store_arg,
 )
 
-from tool_see.tool_searcher import select_tools_for_query
-from tool_see.utils.llm_utils import llm
+from tool_see.tool_searcher import SelectionCache, select_tools_for_query
+from tool_see.utils.llm_utils import get_llm
 from tool_see.utils.tool_utils import ToolMemory, create_tool
 
 
@@ -37,6 +37,8 @@ logger.propagate = False
 class AgentContext(TypedDict, total=False):
     tool_node: Any
     tool_memory: ToolMemory
+    selection_cache: Optional[SelectionCache]
+    selection_params: Dict[str, Any]
 
 
 class RuntimeToolExpansionMiddleware(AgentMiddleware[Any, AgentContext | None]):
@@ -114,11 +116,12 @@ def search_tools(query: str, runtime: ToolRuntime) -> str:
 
     # Stream custom updates as the tool executes
     # runtime.stream_writer(f"Looking up tools for query: {query}")
+    params = {"top_k": 5, "score_threshold": 0.35, **(ctx.get("selection_params") or {})}
     matched_tools = select_tools_for_query(
         query=query,
-        top_k=5,
-        score_threshold=0.35,
         tool_memory=tool_memory,
+        cache=ctx.get("selection_cache"),
+        **params,
     )
     if not matched_tools:
         return "No matching tools found."
@@ -126,7 +129,7 @@ def search_tools(query: str, runtime: ToolRuntime) -> str:
     fetched_tools: List[BaseTool] = []
     summaries: List[str] = []
     for matched_tool_data in matched_tools:
-        tool = create_tool(matched_tool_data)
+        tool = create_tool(matched_tool_data, registry=tool_memory.registry)
         if tool:
             logger.debug("search_tools: created tool: %s", tool)
             fetched_tools.append(tool)
@@ -143,18 +146,28 @@ def search_tools(query: str, runtime: ToolRuntime) -> str:
     return "Registered tools: " + summary
 
 
-def run_agent(prompt: str, tool_memory: ToolMemory) -> str:
+def run_agent(
+    prompt: str,
+    tool_memory: ToolMemory,
+    selection_cache: Optional[SelectionCache] = None,
+    selection_params: Optional[Dict[str, Any]] = None,
+) -> str:
     # `search_tools` is a LangChain tool created with the @tool decorator in tool_searcher
     tools = [search_tools]  # Default tools
 
-    fetched_tools_data = select_tools_for_query(prompt, tool_memory=tool_memory)
+    # With a shared `selection_cache`, repeated prompts skip retrieval until the memory changes.
+    # `selection_params` (e.g. {"top_k": 10, "cutoff": "gap"}) are passed to
+    # select_tools_for_query, here and in `search_tools`.
+    fetched_tools_data = select_tools_for_query(
+        prompt, tool_memory=tool_memory, cache=selection_cache, **(selection_params or {})
+    )
     for tool_data in fetched_tools_data:
-        tool_obj = create_tool(tool_data)
+        tool_obj = create_tool(tool_data, registry=tool_memory.registry)
         if tool_obj:
             tools.append(tool_obj)
 
     agent = create_agent(
-        llm,
+        get_llm(),
         tools=tools,
         middleware=[RuntimeToolExpansionMiddleware()],
         context_schema=AgentContext,
@@ -175,7 +188,12 @@ def run_agent(prompt: str, tool_memory: ToolMemory) -> str:
     logger.info("Running agent with tools=[search_tools] prompt:\n %s", prompt)
     result = agent.invoke(
         {"messages": [{"role": "user", "content": prompt}]},
-        context={"tool_node": tool_node, "tool_memory": tool_memory},
+        context={
+            "tool_node": tool_node,
+            "tool_memory": tool_memory,
+            "selection_cache": selection_cache,
+            "selection_params": selection_params or {},
+        },
     )
     logger.debug("Agent result:\n %s", result)
     if not result:
@@ -1,25 +1,341 @@
-from typing import List, Dict, Any, Optional
+from collections.abc import Mapping
+from typing import List, Dict, Any, Hashable, Iterator, NamedTuple, Optional, Tuple
 
+from tool_see.utils.cache_utils import LRUCache, freeze, normalize_query
 from tool_see.utils.tool_utils import ToolMemory
 
 
+CUTOFFS = ("gap", "elbow", "ratio")
+
+
+_EMPTY: Dict[str, Any] = {}
+_KEYS = ("_tool_id", "_score")
+
+
+class ToolMatch(Mapping):
+    """Read-only view of a selected tool: its id, score and the stored metadata (shared,
+    not copied, so a result costs the same however large the metadata is).
+
+    Behaves like the former result dicts, i.e. the metadata plus "_tool_id" and "_score";
+    `dict(match)` gives a mutable copy. Do not modify `metadata`: it is the stored dict.
+    """
+
+    __slots__ = ("tool_id", "score", "metadata")
+
+    def __init__(self, tool_id: str, score: float, metadata: Optional[Dict[str, Any]]):
+        object.__setattr__(self, "tool_id", tool_id)
+        object.__setattr__(self, "score", score)
+        object.__setattr__(self, "metadata", metadata if metadata is not None else _EMPTY)
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("ToolMatch is read-only")
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "_tool_id":
+            return self.tool_id
+        if key == "_score":
+            return self.score
+        return self.metadata[key]
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self.metadata:
+            if key not in _KEYS:
+                yield key
+        yield from _KEYS
+
+    def __len__(self) -> int:
+        return len(self.metadata) + sum(key not in self.metadata for key in _KEYS)
+
+    def __contains__(self, key: object) -> bool:
+        return key in _KEYS or key in self.metadata
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+    def __reduce__(self):
+        return (ToolMatch, (self.tool_id, self.score, self.metadata))
+
+
+class SelectionCache:
+    """LRU cache of `select_tools_for_query` results.
+
+    Keys hold the memory's `uid` and catalog `version` besides the normalized query and the
+    selection parameters, so any change to the ToolMemory invalidates its cached results
+    (stale entries are never hit again and age out of the LRU). Thread-safe.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self._cache = LRUCache(maxsize, ttl)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get(self, key: Hashable) -> Optional[List[ToolMatch]]:
+        selected = self._cache.get(key)
+        # ToolMatch is read-only, so only the list needs copying
+        return None if selected is None else list(selected)
+
+    def put(self, key: Hashable, selected: List[ToolMatch]) -> None:
+        self._cache.put(key, list(selected))
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hits, misses, hit_rate, evictions, size and maxsize."""
+        return self._cache.stats()
+
+
+class _Selection(NamedTuple):
+    """Parameters of one selection: the memory search and how its results are trimmed."""
+
+    top_k: int
+    score_threshold: Optional[float]
+    nprobe: Optional[int]
+    ef_search: Optional[int]
+    filters: Optional[Dict[str, Any]]
+    mode: str
+    token_budget: Optional[int]
+    cutoff: Optional[str]
+    min_k: int
+    cutoff_ratio: float
+
+    def search_params(self) -> Dict[str, Any]:
+        """Keyword arguments of `ToolMemory.query` / `aquery` / `query_many`."""
+        return {
+            "top_k": self.top_k,
+            "ef_search": self.ef_search,
+            "nprobe": self.nprobe,
+            "filters": self.filters,
+            "mode": self.mode,
+        }
+
+
+class _CachedSelection:
+    """Selections of `queries`: those found in `cache` are served from it, the others
+    (`pending`, one per distinct cache key) are passed to `finish` with their search
+    results, which selects, caches and returns the tools of every query, in order.
+    """
+
+    def __init__(
+        self,
+        queries: List[str],
+        tool_memory: ToolMemory,
+        cache: Optional[SelectionCache],
+        selection: _Selection,
+    ):
+        if selection.cutoff is not None and selection.cutoff not in CUTOFFS:
+            raise ValueError(f"unknown cutoff: {selection.cutoff} (expected one of {CUTOFFS})")
+        self.tool_memory = tool_memory
+        self.cache = cache
+        self.selection = selection
+        if cache is None:
+            self.keys: List[Hashable] = list(range(len(queries)))
+            self.out: List[Optional[List[ToolMatch]]] = [None] * len(queries)
+        else:
+            # keys hold the memory's uid and version, so any change invalidates them
+            head = (tool_memory.uid, tool_memory.version)
+            params = tuple(freeze(p) for p in selection)
+            self.keys = [head + (normalize_query(q),) + params for q in queries]
+            self.out = [cache.get(key) for key in self.keys]
+        # first query of each missing key; repeats (after normalization) share its result
+        missing: Dict[Hashable, str] = {}
+        for key, query, selected in zip(self.keys, queries, self.out):
+            if selected is None:
+                missing.setdefault(key, query)
+        self._missing = list(missing)
+        self.pending = list(missing.values())
+
+    def finish(
+        self, results: List[List[Tuple[str, Dict[str, Any], float]]]
+    ) -> List[List[ToolMatch]]:
+        """Selected tools of every query, given the search `results` of `pending`."""
+        sel = self.selection
+        adaptive = None if sel.cutoff is None else (sel.cutoff, sel.min_k, sel.cutoff_ratio)
+        fresh = {
+            key: _select(r, sel.score_threshold, self.tool_memory, sel.token_budget, adaptive)
+            for key, r in zip(self._missing, results)
+        }
+        if self.cache is not None:
+            for key, selected in fresh.items():
+                self.cache.put(key, selected)
+        return [
+            list(fresh[key]) if selected is None else selected
+            for key, selected in zip(self.keys, self.out)
+        ]
+
+
 def select_tools_for_query(
     query: str,
     tool_memory: ToolMemory,
     top_k: int = 5,
     score_threshold: Optional[float] = None,
-) -> List[Dict[str, Any]]:
-    """Query `tool_memory` and return a list of metadata for matching tools."""
-    results = tool_memory.query(query, top_k=top_k)
-    selected: List[Dict[str, Any]] = []
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    mode: str = "dense",
+    cache: Optional[SelectionCache] = None,
+    token_budget: Optional[int] = None,
+    cutoff: Optional[str] = None,
+    min_k: int = 1,
+    cutoff_ratio: float = 0.9,
+) -> List[ToolMatch]:
+    """Query `tool_memory` and return the matching tools as read-only `ToolMatch` mappings
+    (the stored metadata plus "_tool_id" and "_score", without copying it).
+    `nprobe` (IVF index) and `ef_search` (HNSW index) trade recall for speed per call.
+    `filters` restricts the search to tools with matching metadata, e.g.
+    {"namespace": "billing", "tags": ["invoices", "refunds"]} (the keys must be in the
+    memory's `filter_keys`). `mode="lexical"` (BM25, no embedding call) or "hybrid" need a
+    memory created with `lexical_index=True`.
+    With a `cache`, repeated queries against an unchanged memory skip retrieval.
+    With `token_budget`, the `top_k` best candidates are packed greedily by score while
+    their token costs (counted once per tool, see `ToolMemory.token_costs`) fit in the
+    budget; candidates that do not fit are skipped. Raise `top_k` so that the budget,
+    rather than the count, limits the selection.
+    `cutoff` picks the number of tools from the score distribution of the `top_k`
+    candidates, keeping at least `min_k` (see `adaptive_k`): "gap" cuts at the largest
+    drop between consecutive scores, "elbow" at the knee of the score curve, and "ratio"
+    keeps tools scoring at least `cutoff_ratio` times the top score.
+    """
+    selection = _Selection(
+        top_k,
+        score_threshold,
+        nprobe,
+        ef_search,
+        filters,
+        mode,
+        token_budget,
+        cutoff,
+        min_k,
+        cutoff_ratio,
+    )
+    lookup = _CachedSelection([query], tool_memory, cache, selection)
+    params = selection.search_params()
+    return lookup.finish([tool_memory.query(q, **params) for q in lookup.pending])[0]
+
+
+async def aselect_tools_for_query(
+    query: str,
+    tool_memory: ToolMemory,
+    top_k: int = 5,
+    score_threshold: Optional[float] = None,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    mode: str = "dense",
+    cache: Optional[SelectionCache] = None,
+    token_budget: Optional[int] = None,
+    cutoff: Optional[str] = None,
+    min_k: int = 1,
+    cutoff_ratio: float = 0.9,
+) -> List[ToolMatch]:
+    """Async `select_tools_for_query`, for use inside an event loop (e.g. FastAPI handlers)."""
+    selection = _Selection(
+        top_k,
+        score_threshold,
+        nprobe,
+        ef_search,
+        filters,
+        mode,
+        token_budget,
+        cutoff,
+        min_k,
+        cutoff_ratio,
+    )
+    lookup = _CachedSelection([query], tool_memory, cache, selection)
+    params = selection.search_params()
+    return lookup.finish([await tool_memory.aquery(q, **params) for q in lookup.pending])[0]
+
+
+def select_tools_for_query_batch(
+    queries: List[str],
+    tool_memory: ToolMemory,
+    top_k: int = 5,
+    score_threshold: Optional[float] = None,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    mode: str = "dense",
+    cache: Optional[SelectionCache] = None,
+    token_budget: Optional[int] = None,
+    cutoff: Optional[str] = None,
+    min_k: int = 1,
+    cutoff_ratio: float = 0.9,
+) -> List[List[ToolMatch]]:
+    """Batched `select_tools_for_query`: one embedding request and one scoring pass for
+    all `queries` (those not found in `cache`). Returns the selected tools for each query,
+    in order.
+    """
+    selection = _Selection(
+        top_k,
+        score_threshold,
+        nprobe,
+        ef_search,
+        filters,
+        mode,
+        token_budget,
+        cutoff,
+        min_k,
+        cutoff_ratio,
+    )
+    lookup = _CachedSelection(queries, tool_memory, cache, selection)
+    return lookup.finish(tool_memory.query_many(lookup.pending, **selection.search_params()))
+
+
+def _select(
+    results: List[Tuple[str, Dict[str, Any], float]],
+    score_threshold: Optional[float],
+    tool_memory: ToolMemory,
+    token_budget: Optional[int] = None,
+    adaptive: Optional[Tuple[str, int, float]] = None,
+) -> List[ToolMatch]:
+    selected = [
+        ToolMatch(tid, score, metadata)
+        for tid, metadata, score in results
+        if not (score_threshold and score < score_threshold)
+    ]
+    if adaptive is not None:
+        method, min_k, ratio = adaptive
+        selected = selected[: adaptive_k([m.score for m in selected], method, min_k, ratio)]
+    if token_budget is None:
+        return selected
 
-    for tid, metadata, score in results:
-        if score_threshold and score < score_threshold:
-            continue
-        m = dict(metadata or {})
-        m["_tool_id"] = tid
-        m["_score"] = score
-        selected.append(m)
+    # results are sorted by score: keep each tool that still fits in the budget
+    packed: List[ToolMatch] = []
+    used = 0
+    for match, cost in zip(selected, tool_memory.token_costs([m.tool_id for m in selected])):
+        cost = cost or 0
+        if used + cost <= token_budget:
+            packed.append(match)
+            used += cost
+    return packed
 
-    return selected
 
+def adaptive_k(scores: List[float], method: str, min_k: int = 1, ratio: float = 0.9) -> int:
+    """Number of tools to keep from `scores` (sorted best first), at least `min_k`.
+    - "gap": cut at the largest drop between consecutive scores, if it is at least twice
+      the average drop; otherwise keep all
+    - "elbow": cut at the point of the score curve furthest from the straight line between
+      its ends (a sharp drop keeps the tools before it, a flat head the tools up to it)
+    - "ratio": keep tools scoring at least `ratio` times the top score
+    """
+    n = len(scores)
+    if n <= min_k:
+        return n
+    k = n
+    if method == "gap":
+        # drops after each allowed cut: cutting after index i keeps i + 1 tools
+        start = max(min_k, 1) - 1
+        gaps = [scores[i] - scores[i + 1] for i in range(start, n - 1)]
+        best = max(range(len(gaps)), key=lambda i: gaps[i])
+        if gaps[best] > 0 and gaps[best] >= 2 * sum(gaps) / len(gaps):
+            k = start + best + 1
+    elif method == "elbow" and n >= 3:
+        first, last = scores[0], scores[-1]
+        offsets = [s - (first + (last - first) * i / (n - 1)) for i, s in enumerate(scores)]
+        best = max(range(n), key=lambda i: abs(offsets[i]))
+        if abs(offsets[best]) > 1e-6:
+            k = best + 1 if offsets[best] > 0 else best
+    elif method == "ratio" and scores[0] > 0:
+        k = sum(s >= ratio * scores[0] for s in scores)
+    return max(min_k, min(k, n))
@@ -0,0 +1,633 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import heapq
+import math
+
+import numpy as np
+
+from tool_see.utils.vector_utils import top_k_indices
+
+
+class HNSWIndex:
+    """Hierarchical Navigable Small World graph over the rows of an `EmbeddingMatrix`.
+
+    Nodes are matrix row numbers and rows are L2-normalized, so similarity is the dot
+    product. The index keeps only the graph; vectors are passed in on every call so it
+    works with whatever buffer (in-memory or memory-mapped) the matrix currently uses.
+
+    Parameters:
+      - M: neighbours per node on upper layers (2*M on the bottom layer)
+      - ef_construction: candidate list size while inserting
+      - ef_search: default candidate list size while searching (raised to k if smaller)
+    """
+
+    kind = "hnsw"
+
+    def __init__(
+        self, M: int = 16, ef_construction: int = 100, ef_search: int = 50, seed: int = 42
+    ):
+        if M < 2:
+            raise ValueError("M must be at least 2")
+        self.M = M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.seed = seed
+        self._level_mult = 1 / math.log(M)
+        self._rng = np.random.default_rng(seed)
+        # _neighbors[node][level] -> list of neighbour nodes
+        self._neighbors: List[List[List[int]]] = []
+        self._entry: Optional[int] = None
+        self._max_level = -1
+
+    def __len__(self) -> int:
+        return len(self._neighbors)
+
+    def _max_degree(self, level: int) -> int:
+        return self.M * 2 if level == 0 else self.M
+
+    def add(self, vectors: np.ndarray, rows: Iterable[int]) -> None:
+        """Insert the new `rows` of `vectors` into the graph (rows are never rewritten:
+        a re-embedded tool gets a new row).
+        """
+        for row in rows:
+            row = int(row)
+            while len(self._neighbors) < row:  # keep node ids aligned with rows
+                self._insert(vectors, len(self._neighbors))
+            self._insert(vectors, row)
+
+    def remap(self, vectors: np.ndarray, keep: np.ndarray) -> None:
+        """Drop the nodes not in `keep` (old node of each new row) and renumber the rest.
+        Nodes that lost links are repaired from their removed neighbours' links, as in
+        hnswlib, so the graph stays navigable without a rebuild.
+        """
+        new_of = {int(old): new for new, old in enumerate(keep.tolist())}
+        old_neighbors = self._neighbors
+        neighbors = []
+        for old in keep.tolist():
+            node = new_of[old]
+            levels = []
+            for lc, links in enumerate(old_neighbors[old]):
+                kept = [new_of[n] for n in links if n in new_of]
+                if len(kept) < len(links):
+                    # two-hop candidates through the removed neighbours
+                    extra = {
+                        new_of[m]
+                        for n in links
+                        if n not in new_of and lc < len(old_neighbors[n])
+                        for m in old_neighbors[n][lc]
+                        if m in new_of and new_of[m] != node
+                    }
+                    candidates = list(dict.fromkeys(kept + sorted(extra)))
+                    sims = (vectors[candidates] @ vectors[node]).tolist() if candidates else []
+                    kept = self._select_neighbors(
+                        vectors, list(zip(sims, candidates)), self._max_degree(lc)
+                    )
+                levels.append(kept)
+            neighbors.append(levels)
+        self._neighbors = neighbors
+        if self._entry is not None and self._entry in new_of:
+            self._entry = new_of[self._entry]
+        elif neighbors:
+            self._entry = max(range(len(neighbors)), key=lambda n: len(neighbors[n]))
+        else:
+            self._entry = None
+        self._max_level = -1 if self._entry is None else len(neighbors[self._entry]) - 1
+
+    def _insert(self, vectors: np.ndarray, node: int) -> None:
+        level = int(-math.log(1.0 - self._rng.random()) * self._level_mult)
+        self._neighbors.append([[] for _ in range(level + 1)])
+        if self._entry is None:
+            self._entry, self._max_level = node, level
+            return
+        self._link(vectors, node, level)
+        if level > self._max_level:
+            self._entry, self._max_level = node, level
+
+    def _link(self, vectors: np.ndarray, node: int, level: int) -> None:
+        query = vectors[node]
+        entry_points = [self._entry]
+        for lc in range(self._max_level, level, -1):
+            entry_points = [self._search_layer(vectors, query, entry_points, 1, lc)[0][1]]
+        for lc in range(min(level, self._max_level), -1, -1):
+            found = self._search_layer(vectors, query, entry_points, self.ef_construction, lc)
+            candidates = [(s, n) for s, n in found if n != node]
+            selected = self._select_neighbors(vectors, candidates, self.M)
+            self._neighbors[node][lc] = selected
+            max_degree = self._max_degree(lc)
+            for n in selected:
+                links = self._neighbors[n][lc]
+                links.append(node)
+                if len(links) > max_degree:
+                    sims = vectors[links] @ vectors[n]
+                    self._neighbors[n][lc] = self._select_neighbors(
+                        vectors, list(zip(sims.tolist(), links)), max_degree
+                    )
+            entry_points = [n for _, n in found]
+
+    def _select_neighbors(
+        self, vectors: np.ndarray, candidates: List[Tuple[float, int]], m: int
+    ) -> List[int]:
+        """HNSW neighbour-selection heuristic: prefer candidates that are closer to the base
+        node than to any neighbour already selected (keeps the graph navigable across
+        clusters), then fill up with the closest remaining candidates.
+        """
+        candidates = sorted(candidates, reverse=True)
+        if len(candidates) <= m:
+            return [n for _, n in candidates]
+        nodes = [n for _, n in candidates]
+        pairwise = (vectors[nodes] @ vectors[nodes].T).tolist()
+        selected: List[int] = []
+        pruned: List[int] = []
+        for i, (sim, _) in enumerate(candidates):
+            if len(selected) >= m:
+                break
+            row = pairwise[i]
+            if all(row[j] < sim for j in selected):
+                selected.append(i)
+            else:
+                pruned.append(i)
+        selected.extend(pruned[: m - len(selected)])
+        return [nodes[i] for i in selected]
+
+    def _search_layer(
+        self,
+        vectors: np.ndarray,
+        query: np.ndarray,
+        entry_points: List[int],
+        ef: int,
+        level: int,
+        limit: Optional[int] = None,
+        alive: Optional[np.ndarray] = None,
+    ) -> List[Tuple[float, int]]:
+        """Best-first search on one layer. Returns up to `ef` (similarity, node), best first.
+        Nodes >= `limit` are ignored (rows not visible to the caller). Nodes outside the
+        `alive` mask (tombstones) are still traversed, as hnswlib does with deleted
+        elements, but never returned, so they do not take the place of live results.
+        """
+        visited = set(entry_points)
+        sims = (vectors[entry_points] @ query).tolist()
+        candidates = [(-s, n) for s, n in zip(sims, entry_points)]
+        heapq.heapify(candidates)
+        results = [
+            (s, n) for s, n in zip(sims, entry_points) if alive is None or alive[n]
+        ]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            neg_sim, node = heapq.heappop(candidates)
+            if len(results) >= ef and -neg_sim < results[0][0]:
+                break
+            links = self._neighbors[node]
+            if level >= len(links):
+                continue
+            fresh = [
+                n for n in links[level] if n not in visited and (limit is None or n < limit)
+            ]
+            if not fresh:
+                continue
+            visited.update(fresh)
+            for n, s in zip(fresh, (vectors[fresh] @ query).tolist()):
+                if len(results) < ef or s > results[0][0]:
+                    heapq.heappush(candidates, (-s, n))
+                    if alive is None or alive[n]:
+                        heapq.heappush(results, (s, n))
+                        if len(results) > ef:
+                            heapq.heappop(results)
+        return sorted(results, reverse=True)
+
+    def search(
+        self,
+        vectors: np.ndarray,
+        query: np.ndarray,
+        k: int,
+        ef_search: Optional[int] = None,
+        alive: Optional[np.ndarray] = None,
+        **_: Any,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate top-`k` rows for the normalized `query`, as (rows, scores) best first.
+        Only rows in the `alive` mask are returned. Search parameters of other index types
+        are ignored.
+        """
+        if self._entry is None or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        limit = min(len(self._neighbors), vectors.shape[0])
+        ef = max(ef_search or self.ef_search, k)
+        entry_points = [self._entry]
+        for lc in range(self._max_level, 0, -1):
+            entry_points = [self._search_layer(vectors, query, entry_points, 1, lc, limit)[0][1]]
+        found = self._search_layer(vectors, query, entry_points, ef, 0, limit, alive)[:k]
+        rows = np.array([n for _, n in found], dtype=np.int64)
+        scores = np.array([s for s, _ in found], dtype=np.float32)
+        return rows, scores
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """Arrays describing the index, for `np.savez`."""
+        levels = np.array([len(links) - 1 for links in self._neighbors], dtype=np.int32)
+        state = {
+            "kind": np.array(self.kind),
+            "params": np.array([self.M, self.ef_construction, self.ef_search, self.seed]),
+            "entry": np.array(-1 if self._entry is None else self._entry),
+            "levels": levels,
+        }
+        for lc in range(self._max_level + 1):
+            # CSR adjacency of layer lc (nodes below that layer have no links there)
+            counts = [len(links[lc]) if lc < len(links) else 0 for links in self._neighbors]
+            state[f"offsets_{lc}"] = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+            state[f"links_{lc}"] = np.array(
+                [n for links in self._neighbors if lc < len(links) for n in links[lc]],
+                dtype=np.int64,
+            )
+        return state
+
+    @classmethod
+    def from_state(cls, state) -> "HNSWIndex":
+        M, ef_construction, ef_search, seed = (int(x) for x in state["params"])
+        index = cls(M=M, ef_construction=ef_construction, ef_search=ef_search, seed=seed)
+        levels = state["levels"].tolist()
+        index._neighbors = [[[] for _ in range(level + 1)] for level in levels]
+        index._max_level = max(levels) if levels else -1
+        for lc in range(index._max_level + 1):
+            offsets = state[f"offsets_{lc}"].tolist()
+            links = state[f"links_{lc}"].tolist()
+            for node, level in enumerate(levels):
+                if level >= lc:
+                    index._neighbors[node][lc] = links[offsets[node] : offsets[node + 1]]
+        entry = int(state["entry"])
+        index._entry = None if entry < 0 else entry
+        # Continue the level sequence rather than repeating it after a reload
+        index._rng = np.random.default_rng([seed, len(levels)])
+        return index
+
+
+def _assign(x: np.ndarray, centroids: np.ndarray, spherical: bool) -> np.ndarray:
+    """Index of the nearest centroid for each row of `x` (chunked to bound memory)."""
+    # Euclidean: argmin |x - c|^2 == argmax (x.c - |c|^2 / 2)
+    bias = None if spherical else 0.5 * np.einsum("ij,ij->i", centroids, centroids)
+    out = np.empty(x.shape[0], dtype=np.int64)
+    for start in range(0, x.shape[0], 16384):
+        sims = x[start : start + 16384] @ centroids.T
+        if bias is not None:
+            sims -= bias
+        out[start : start + 16384] = sims.argmax(axis=1)
+    return out
+
+
+def kmeans(
+    x: np.ndarray, k: int, iters: int = 20, seed: int = 42, spherical: bool = True
+) -> np.ndarray:
+    """Lloyd's k-means over the rows of `x`, returning (k, dim) centroids.
+    With `spherical=True` centroids are re-normalized and points assigned by dot product
+    (cosine k-means, for normalized embeddings); otherwise by Euclidean distance.
+    """
+    x = np.ascontiguousarray(x, dtype=np.float32)
+    n = x.shape[0]
+    if n == 0:
+        raise ValueError("cannot run k-means on zero vectors")
+    k = min(k, n)
+    rng = np.random.default_rng(seed)
+    centroids = x[rng.choice(n, k, replace=False)].copy()
+    for _ in range(iters):
+        assignment = _assign(x, centroids, spherical)
+        counts = np.bincount(assignment, minlength=k)
+        order = np.argsort(assignment, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        nonempty = counts > 0
+        sums = np.add.reduceat(x[order], starts[nonempty], axis=0)
+        centroids[nonempty] = sums / counts[nonempty, None]
+        # Re-seed empty clusters with random points
+        n_empty = int((~nonempty).sum())
+        if n_empty:
+            centroids[~nonempty] = x[rng.choice(n, n_empty, replace=False)]
+        if spherical:
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids /= norms
+    return centroids
+
+
+class IVFIndex:
+    """Inverted-file index: rows are partitioned by their nearest k-means centroid and a
+    query only scans the rows of its `nprobe` nearest partitions.
+
+    Cheap to update (a new row is one centroid lookup and a list append), which suits
+    write-heavy catalogs. The centroids are trained once the index holds
+    `auto_train_size` rows (default: 39 * nlist) or on demand with `train()`; until then,
+    searches scan every row exactly.
+
+    Parameters:
+      - nlist: number of partitions (centroids)
+      - nprobe: default number of partitions scanned per query
+    """
+
+    kind = "ivf"
+
+    def __init__(
+        self,
+        nlist: int = 100,
+        nprobe: int = 8,
+        auto_train_size: Optional[int] = None,
+        seed: int = 42,
+    ):
+        if nlist < 1:
+            raise ValueError("nlist must be at least 1")
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.auto_train_size = auto_train_size if auto_train_size is not None else 39 * nlist
+        self.seed = seed
+        self._centroids: Optional[np.ndarray] = None
+        # partition of each row (-1 until trained) and the rows of each partition
+        self._assignment: List[int] = []
+        self._lists: List[List[int]] = []
+
+    def __len__(self) -> int:
+        return len(self._assignment)
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    def train(self, vectors: np.ndarray) -> None:
+        """(Re)train the centroids on the indexed rows of `vectors` and reassign every row."""
+        size = len(self._assignment)
+        if size == 0:
+            return
+        sample = vectors[:size]
+        max_sample = 256 * self.nlist
+        if size > max_sample:
+            rng = np.random.default_rng(self.seed)
+            sample = vectors[np.sort(rng.choice(size, max_sample, replace=False))]
+        self._centroids = kmeans(sample, self.nlist, seed=self.seed)
+        assignment = _assign(vectors[:size], self._centroids, spherical=True)
+        self._assignment = assignment.tolist()
+        self._lists = [[] for _ in range(self._centroids.shape[0])]
+        for row, part in enumerate(self._assignment):
+            self._lists[part].append(row)
+
+    def add(self, vectors: np.ndarray, rows: Iterable[int]) -> None:
+        """Assign the new `rows` to their nearest partition."""
+        rows = [int(r) for r in rows]
+        if not rows:
+            return
+        if max(rows) >= len(self._assignment):
+            self._assignment.extend([-1] * (max(rows) + 1 - len(self._assignment)))
+        if not self.is_trained:
+            if len(self._assignment) >= self.auto_train_size:
+                self.train(vectors)
+            return
+        parts = _assign(vectors[rows], self._centroids, spherical=True).tolist()
+        for row, part in zip(rows, parts):
+            self._assignment[row] = part
+            self._lists[part].append(row)
+
+    def remap(self, vectors: np.ndarray, keep: np.ndarray) -> None:
+        """Keep only the rows in `keep` (old row of each new row), renumbered."""
+        self._assignment = [self._assignment[old] for old in keep.tolist()]
+        if self.is_trained:
+            self._lists = [[] for _ in range(self._centroids.shape[0])]
+            for row, part in enumerate(self._assignment):
+                if part >= 0:
+                    self._lists[part].append(row)
+
+    def search(
+        self,
+        vectors: np.ndarray,
+        query: np.ndarray,
+        k: int,
+        nprobe: Optional[int] = None,
+        alive: Optional[np.ndarray] = None,
+        **_: Any,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-`k` rows among the `nprobe` nearest partitions, as (rows, scores) best first.
+        Only rows in the `alive` mask are returned. Search parameters of other index types
+        are ignored.
+        """
+        size = min(len(self._assignment), vectors.shape[0])
+        if size == 0 or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        if not self.is_trained:
+            candidates = np.arange(size)
+        else:
+            probe = top_k_indices(self._centroids @ query, nprobe or self.nprobe)
+            candidates = np.array(
+                [row for part in probe.tolist() for row in self._lists[part]], dtype=np.int64
+            )
+            candidates = candidates[candidates < size]
+        if alive is not None:
+            candidates = candidates[alive[candidates]]
+        scores = vectors[candidates] @ query
+        best = top_k_indices(scores, k)
+        return candidates[best], scores[best]
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """Arrays describing the index, for `np.savez`."""
+        state = {
+            "kind": np.array(self.kind),
+            "params": np.array([self.nlist, self.nprobe, self.auto_train_size, self.seed]),
+            "assignment": np.array(self._assignment, dtype=np.int64),
+        }
+        if self._centroids is not None:
+            state["centroids"] = self._centroids
+        return state
+
+    @classmethod
+    def from_state(cls, state) -> "IVFIndex":
+        nlist, nprobe, auto_train_size, seed = (int(x) for x in state["params"])
+        index = cls(nlist=nlist, nprobe=nprobe, auto_train_size=auto_train_size, seed=seed)
+        index._assignment = state["assignment"].tolist()
+        if "centroids" in state:
+            index._centroids = np.asarray(state["centroids"], dtype=np.float32)
+            index._lists = [[] for _ in range(index._centroids.shape[0])]
+            for row, part in enumerate(index._assignment):
+                if part >= 0:
+                    index._lists[part].append(row)
+        return index
+
+
+class PQIndex:
+    """Product-quantization index: each row is split into `m` sub-vectors and stored as the
+    ids of their nearest sub-codebook centroids (`m` bytes per tool instead of 4 * dim).
+
+    Queries are scored by asymmetric distance computation: one lookup table of query /
+    centroid dot products per sub-space, summed over each row's codes. The best
+    `k * rerank` candidates are then re-scored exactly against the float32 rows
+    (`rerank=0` returns the approximate scores). The codebooks are trained once the index
+    holds `auto_train_size` rows (default: 39 * 2**nbits) or on demand with `train()`;
+    until then, searches scan every row exactly.
+
+    Parameters:
+      - m: number of sub-spaces (lowered to the nearest divisor of the dimension)
+      - nbits: bits per code (at most 8, i.e. 256 centroids per sub-space)
+      - rerank: default exact re-rank factor
+    """
+
+    kind = "pq"
+
+    def __init__(
+        self,
+        m: int = 32,
+        nbits: int = 8,
+        rerank: int = 10,
+        auto_train_size: Optional[int] = None,
+        seed: int = 42,
+    ):
+        if m < 1:
+            raise ValueError("m must be at least 1")
+        if not 1 <= nbits <= 8:
+            raise ValueError("nbits must be between 1 and 8")
+        self.m = m
+        self.nbits = nbits
+        self.rerank = rerank
+        self.auto_train_size = auto_train_size if auto_train_size is not None else 39 << nbits
+        self.seed = seed
+        # (m, ksub, dsub) centroids, and the codes of every indexed row stored sub-space
+        # major (m, capacity) so scoring gathers from one contiguous code array per sub-space
+        self._codebooks: Optional[np.ndarray] = None
+        self._codes = np.zeros((0, 0), dtype=np.uint8)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def is_trained(self) -> bool:
+        return self._codebooks is not None
+
+    def train(self, vectors: np.ndarray) -> None:
+        """(Re)train the sub-codebooks on the indexed rows of `vectors` and re-encode them."""
+        size = self._size
+        if size == 0:
+            return
+        dim = vectors.shape[1]
+        m = max(d for d in range(1, min(self.m, dim) + 1) if dim % d == 0)
+        sample = vectors[:size]
+        max_sample = 256 << self.nbits
+        if size > max_sample:
+            rng = np.random.default_rng(self.seed)
+            sample = vectors[np.sort(rng.choice(size, max_sample, replace=False))]
+        sample = np.asarray(sample, dtype=np.float32).reshape(len(sample), m, dim // m)
+        ksub = min(1 << self.nbits, len(sample))
+        self._codebooks = np.stack(
+            [
+                kmeans(sample[:, j], ksub, seed=self.seed + j, spherical=False)
+                for j in range(m)
+            ]
+        )
+        self._codes = np.zeros((m, max(size, 16)), dtype=np.uint8)
+        self._encode(vectors, np.arange(size))
+
+    def _encode(self, vectors: np.ndarray, rows: np.ndarray) -> None:
+        m, _, dsub = self._codebooks.shape
+        for start in range(0, len(rows), 16384):
+            chunk = rows[start : start + 16384]
+            x = np.asarray(vectors[chunk], dtype=np.float32).reshape(len(chunk), m, dsub)
+            for j in range(m):
+                self._codes[j, chunk] = _assign(x[:, j], self._codebooks[j], spherical=False)
+
+    def add(self, vectors: np.ndarray, rows: Iterable[int]) -> None:
+        """Encode the new `rows`."""
+        rows = np.fromiter((int(r) for r in rows), dtype=np.int64)
+        if not len(rows):
+            return
+        self._size = max(self._size, int(rows.max()) + 1)
+        if not self.is_trained:
+            if self._size >= self.auto_train_size:
+                self.train(vectors)
+            return
+        capacity = self._codes.shape[1]
+        if self._size > capacity:
+            codes = np.zeros((self._codes.shape[0], max(self._size, 2 * capacity)), dtype=np.uint8)
+            codes[:, :capacity] = self._codes
+            self._codes = codes
+        self._encode(vectors, rows)
+
+    def remap(self, vectors: np.ndarray, keep: np.ndarray) -> None:
+        """Keep only the rows in `keep` (old row of each new row), renumbered."""
+        keep = keep[keep < self._size]
+        if self.is_trained:
+            self._codes = self._codes[:, keep]
+        self._size = len(keep)
+
+    def _adc_scores(self, query: np.ndarray, size: int) -> np.ndarray:
+        m, _, dsub = self._codebooks.shape
+        # lut[j, c]: dot product of the query's j-th sub-vector with centroid c of sub-space j
+        lut = np.einsum("jkd,jd->jk", self._codebooks, query.reshape(m, dsub))
+        out = np.zeros(size, dtype=np.float32)
+        for j in range(m):
+            out += lut[j].take(self._codes[j, :size])
+        return out
+
+    def search(
+        self,
+        vectors: np.ndarray,
+        query: np.ndarray,
+        k: int,
+        rerank: Optional[int] = None,
+        alive: Optional[np.ndarray] = None,
+        **_: Any,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-`k` rows by ADC score, re-ranked exactly over the best `k * rerank`, as
+        (rows, scores) best first. Only rows in the `alive` mask are returned. Search
+        parameters of other index types are ignored.
+        """
+        size = min(self._size, vectors.shape[0])
+        if size == 0 or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        live = None if alive is None else np.flatnonzero(alive[:size])
+        if not self.is_trained:
+            rows = np.arange(size) if live is None else live
+            scores = vectors[rows] @ query
+            best = top_k_indices(scores, k)
+            return rows[best], scores[best]
+        scores = self._adc_scores(query, size)
+        if live is not None:
+            scores, rows = scores[live], live
+        else:
+            rows = np.arange(size)
+        rerank = self.rerank if rerank is None else rerank
+        if rerank <= 1:
+            best = top_k_indices(scores, k)
+            return rows[best], scores[best]
+        candidates = rows[top_k_indices(scores, k * rerank)]
+        exact = vectors[candidates] @ query
+        best = top_k_indices(exact, k)
+        return candidates[best], exact[best]
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """Arrays describing the index, for `np.savez`."""
+        state = {
+            "kind": np.array(self.kind),
+            "params": np.array(
+                [self.m, self.nbits, self.rerank, self.auto_train_size, self.seed, self._size]
+            ),
+        }
+        if self._codebooks is not None:
+            state["codebooks"] = self._codebooks
+            state["codes"] = self._codes[:, : self._size]
+        return state
+
+    @classmethod
+    def from_state(cls, state) -> "PQIndex":
+        m, nbits, rerank, auto_train_size, seed, size = (int(x) for x in state["params"])
+        index = cls(m=m, nbits=nbits, rerank=rerank, auto_train_size=auto_train_size, seed=seed)
+        index._size = size
+        if "codebooks" in state:
+            index._codebooks = np.asarray(state["codebooks"], dtype=np.float32)
+            index._codes = np.array(state["codes"], dtype=np.uint8)
+        return index
+
+
+INDEX_TYPES = {HNSWIndex.kind: HNSWIndex, IVFIndex.kind: IVFIndex, PQIndex.kind: PQIndex}
+
+
+def make_index(kind: str, params: Optional[Dict] = None):
+    """Create an empty index of `kind` ("exact" means no index: brute-force scoring)."""
+    if kind == "exact":
+        return None
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"unknown index: {kind} (expected 'exact' or one of {list(INDEX_TYPES)})")
+    return INDEX_TYPES[kind](**(params or {}))
+
+
+def index_from_state(state: Dict[str, np.ndarray]):
+    return INDEX_TYPES[str(state["kind"])].from_state(state)
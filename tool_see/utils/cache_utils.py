@@ -0,0 +1,249 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+import hashlib
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+
+_MISSING = object()
+
+
+def normalize_query(text: str) -> str:
+    """Cache key form of a query: case-folded, with whitespace collapsed."""
+    return " ".join(str(text).split()).casefold()
+
+
+def freeze(value: Any) -> Hashable:
+    """Hashable, order-insensitive form of a cache key part such as query `filters`."""
+    if isinstance(value, dict):
+        return tuple(sorted(((k, freeze(v)) for k, v in value.items()), key=repr))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted((freeze(v) for v in value), key=repr))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+class LRUCache:
+    """Thread-safe bounded LRU mapping with an optional TTL (seconds) and hit/miss counters."""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # key -> (expires_at or None, value)
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                expires_at, value = item
+                if expires_at is None or time.monotonic() < expires_at:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Persistent SQLite cache of document embeddings keyed by (model, sha256 of the text).
+    Lets re-ingesting unchanged tools skip the embedding API, across processes and restarts.
+    """
+
+    # SQLite limits the number of bound parameters per statement
+    _CHUNK = 500
+
+    def __init__(self, path: str):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL,"
+                " text_hash TEXT NOT NULL,"
+                " embedding BLOB NOT NULL,"
+                " PRIMARY KEY (model, text_hash))"
+            )
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Cached embeddings for `texts`, with None for texts that are not cached."""
+        hashes = [text_hash(t) for t in texts]
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for start in range(0, len(hashes), self._CHUNK):
+                chunk = list(set(hashes[start : start + self._CHUNK]))
+                rows = self._conn.execute(
+                    "SELECT text_hash, embedding FROM embeddings WHERE model = ?"
+                    f" AND text_hash IN ({','.join('?' * len(chunk))})",
+                    [model, *chunk],
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = np.frombuffer(blob, dtype=np.float32)
+        results = [found.get(h) for h in hashes]
+        hits = sum(r is not None for r in results)
+        self.hits += hits
+        self.misses += len(results) - hits
+        return results
+
+    def put_many(self, model: str, texts: List[str], embeddings) -> None:
+        rows = [
+            (model, text_hash(t), np.asarray(e, dtype=np.float32).tobytes())
+            for t, e in zip(texts, embeddings)
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, embedding)"
+                " VALUES (?, ?, ?)",
+                rows,
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class SemanticCache:
+    """Results of recent queries, served again for queries whose normalized embedding has
+    cosine similarity >= `threshold` with a cached one (and the same search parameters).
+
+    Embeddings live in one preallocated (maxsize, dim) float32 matrix, so a lookup is a
+    single matrix-vector product over at most `maxsize` rows, much cheaper than scanning
+    the catalog. Slots are recycled least-recently-used first. Entries belong to one
+    catalog version: the cache empties itself when it sees a newer one. Thread-safe.
+    """
+
+    def __init__(self, maxsize: int = 256, threshold: float = 0.95):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, version: Optional[int]) -> None:
+        self._version = version
+        self._vectors: Optional[np.ndarray] = None
+        # parameter-set id of each slot (-1: empty) and its last use, for LRU recycling
+        self._params = np.full(self.maxsize, -1, dtype=np.int64)
+        self._used = np.zeros(self.maxsize, dtype=np.int64)
+        self._values: List[Any] = [None] * self.maxsize
+        self._param_ids: Dict[Hashable, int] = {}
+        self._tick = 0
+
+    def __len__(self) -> int:
+        return int((self._params >= 0).sum())
+
+    def get(self, query: np.ndarray, params: Hashable, version: int) -> Any:
+        """Cached value for a query similar to the normalized `query`, or None."""
+        with self._lock:
+            if self._version is not None and version > self._version:
+                self._reset(version)
+            pid = self._param_ids.get(params) if version == self._version else None
+            if pid is None or self._vectors is None or query.shape[0] != self._vectors.shape[1]:
+                self.misses += 1
+                return None
+            sims = self._vectors @ query
+            sims[self._params != pid] = -np.inf
+            best = int(np.argmax(sims))
+            if sims[best] < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._tick += 1
+            self._used[best] = self._tick
+            return self._values[best]
+
+    def put(self, query: np.ndarray, params: Hashable, version: int, value: Any) -> None:
+        with self._lock:
+            if self._version is not None and version < self._version:
+                return  # computed on an older catalog
+            if (
+                version != self._version
+                or (self._vectors is not None and query.shape[0] != self._vectors.shape[1])
+                or len(self._param_ids) >= 4 * self.maxsize
+            ):
+                self._reset(version)
+            if self._vectors is None:
+                self._vectors = np.zeros((self.maxsize, query.shape[0]), dtype=np.float32)
+            empty = np.flatnonzero(self._params < 0)
+            if len(empty):
+                slot = int(empty[0])
+            else:
+                slot = int(np.argmin(self._used))
+                self.evictions += 1
+            self._tick += 1
+            self._vectors[slot] = query
+            self._params[slot] = self._param_ids.setdefault(params, len(self._param_ids))
+            self._used[slot] = self._tick
+            self._values[slot] = value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset(None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self),
+            "maxsize": self.maxsize,
+        }
@@ -0,0 +1,195 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Optional, Tuple
+import asyncio
+import re
+import time
+import zlib
+
+from langchain_core.embeddings import Embeddings
+import numpy as np
+
+
+def _embed_chunk(
+    embedder: Embeddings, texts: List[str], max_retries: int, retry_backoff: float
+) -> List[List[float]]:
+    attempt = 0
+    while True:
+        try:
+            embs = embedder.embed_documents(texts)
+            if len(embs) != len(texts):
+                raise ValueError(f"expected {len(texts)} embeddings, got {len(embs)}")
+            return embs
+        except Exception:
+            if attempt >= max_retries:
+                raise
+            time.sleep(retry_backoff * 2**attempt)
+            attempt += 1
+
+
+def embed_documents_chunked(
+    embedder: Embeddings,
+    texts: List[str],
+    batch_size: int = 256,
+    max_workers: int = 4,
+    max_retries: int = 2,
+    retry_backoff: float = 1.0,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[List[Optional[List[float]]], List[Exception]]:
+    """Embed `texts` in chunks of `batch_size`, with up to `max_workers` requests in flight.
+
+    Each failed chunk is retried on its own (exponential backoff) up to `max_retries` times;
+    a chunk that still fails does not affect the others. `progress_callback(done, total)` is
+    called with the number of texts finished so far.
+
+    Returns:
+      The embeddings in input order (None for texts of failed chunks) and the chunk errors.
+    """
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+    results: List[Optional[List[float]]] = [None] * len(texts)
+    errors: List[Exception] = []
+    chunks = [
+        (start, texts[start : start + batch_size]) for start in range(0, len(texts), batch_size)
+    ]
+    done = 0
+
+    def finish(start: int, chunk: List[str], embs: Optional[List[List[float]]]):
+        nonlocal done
+        if embs is not None:
+            results[start : start + len(chunk)] = embs
+        done += len(chunk)
+        if progress_callback:
+            progress_callback(done, len(texts))
+
+    if max_workers <= 1 or len(chunks) <= 1:
+        for start, chunk in chunks:
+            try:
+                embs = _embed_chunk(embedder, chunk, max_retries, retry_backoff)
+            except Exception as e:
+                errors.append(e)
+                embs = None
+            finish(start, chunk, embs)
+        return results, errors
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+        futures = {
+            pool.submit(_embed_chunk, embedder, chunk, max_retries, retry_backoff): (start, chunk)
+            for start, chunk in chunks
+        }
+        for future in as_completed(futures):
+            start, chunk = futures[future]
+            try:
+                embs = future.result()
+            except Exception as e:
+                errors.append(e)
+                embs = None
+            finish(start, chunk, embs)
+    return results, errors
+
+
+async def _aembed_chunk(
+    embedder: Embeddings, texts: List[str], max_retries: int, retry_backoff: float
+) -> List[List[float]]:
+    attempt = 0
+    while True:
+        try:
+            embs = await embedder.aembed_documents(texts)
+            if len(embs) != len(texts):
+                raise ValueError(f"expected {len(texts)} embeddings, got {len(embs)}")
+            return embs
+        except Exception:
+            if attempt >= max_retries:
+                raise
+            await asyncio.sleep(retry_backoff * 2**attempt)
+            attempt += 1
+
+
+async def aembed_documents_chunked(
+    embedder: Embeddings,
+    texts: List[str],
+    batch_size: int = 256,
+    max_concurrency: int = 4,
+    max_retries: int = 2,
+    retry_backoff: float = 1.0,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[List[Optional[List[float]]], List[Exception]]:
+    """Async `embed_documents_chunked`: at most `max_concurrency` chunks are awaited at once."""
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+    results: List[Optional[List[float]]] = [None] * len(texts)
+    errors: List[Exception] = []
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    done = 0
+
+    async def run(start: int, chunk: List[str]):
+        nonlocal done
+        async with semaphore:
+            try:
+                embs = await _aembed_chunk(embedder, chunk, max_retries, retry_backoff)
+                results[start : start + len(chunk)] = embs
+            except Exception as e:
+                errors.append(e)
+        done += len(chunk)
+        if progress_callback:
+            progress_callback(done, len(texts))
+
+    await asyncio.gather(
+        *(
+            run(start, texts[start : start + batch_size])
+            for start in range(0, len(texts), batch_size)
+        )
+    )
+    return results, errors
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic local embedder: word and character n-gram features are hashed (CRC32)
+    into `dim` signed buckets, i.e. a sparse random projection of the bag of n-grams.
+
+    Needs no network or model weights, so ToolMemory can be tested and benchmarked in
+    isolation. Similarity is lexical (shared words and word pieces), not semantic.
+    """
+
+    def __init__(self, dim: int = 384, ngram_range: Tuple[int, int] = (3, 5)):
+        if dim < 1:
+            raise ValueError("dim must be positive")
+        self.dim = dim
+        self.ngram_range = ngram_range
+        # keys the query and embedding caches
+        self.model = f"hashing-{dim}-{ngram_range[0]}-{ngram_range[1]}"
+
+    def _features(self, text: str) -> List[str]:
+        words = re.findall(r"\w+", text.lower())
+        features = ["w:" + word for word in words]
+        low, high = self.ngram_range
+        for word in words:
+            padded = f" {word} "
+            for n in range(low, high + 1):
+                features.extend(padded[i : i + n] for i in range(len(padded) - n + 1))
+        return features
+
+    def _embed(self, text: str) -> List[float]:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        hashes = np.array(
+            [zlib.crc32(f.encode("utf-8")) for f in self._features(str(text))], dtype=np.int64
+        )
+        if len(hashes):
+            # low bits pick the bucket, the top bit the sign
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+            np.add.at(vec, hashes % self.dim, signs)
+            norm = np.linalg.norm(vec)
+            if norm > 0:
+                vec /= norm
+        return vec.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self._embed(text)
@@ -0,0 +1,54 @@
+from typing import Any, Dict, Iterable, List, Sequence
+
+import numpy as np
+
+
+def _values(value: Any) -> List[Any]:
+    """Hashable values of a metadata field or filter: list-like values count element-wise."""
+    items = value if isinstance(value, (list, tuple, set, frozenset)) else [value]
+    out = []
+    for item in items:
+        try:
+            hash(item)
+        except TypeError:
+            continue
+        out.append(item)
+    return out
+
+
+class MetadataIndex:
+    """Inverted index from metadata values of selected keys to matrix rows.
+
+    Postings are only appended to, so a reader holding a snapshot of `size` rows can use
+    them while a writer adds rows (rows >= size are ignored). A tool whose field holds a
+    list (e.g. tags) is posted under each element.
+    """
+
+    def __init__(self, keys: Sequence[str]):
+        self.keys = list(keys)
+        # key -> value -> rows
+        self._postings: Dict[str, Dict[Any, List[int]]] = {key: {} for key in self.keys}
+
+    def add(self, rows: Iterable[int], metadatas: Iterable[Dict[str, Any]]) -> None:
+        for row, metadata in zip(rows, metadatas):
+            for key, postings in self._postings.items():
+                if key in metadata:
+                    for value in _values(metadata[key]):
+                        postings.setdefault(value, []).append(int(row))
+
+    def mask(self, filters: Dict[str, Any], size: int) -> np.ndarray:
+        """Boolean mask of the first `size` rows matching every filter.
+        A filter value matches tools whose field equals it (or contains it, for list
+        fields); a list of values matches tools with any of them.
+        """
+        mask = np.ones(size, dtype=bool)
+        for key, wanted in filters.items():
+            postings = self._postings.get(key)
+            if postings is None:
+                raise ValueError(f"cannot filter on {key!r}: filter_keys are {self.keys}")
+            matches = np.zeros(size, dtype=bool)
+            for value in _values(wanted):
+                rows = np.array(postings.get(value, ()), dtype=np.int64)
+                matches[rows[rows < size]] = True
+            mask &= matches
+        return mask
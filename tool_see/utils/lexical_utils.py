@@ -0,0 +1,77 @@
+from typing import Dict, Iterable, List, Optional
+import math
+import re
+
+import numpy as np
+
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[_-][a-z0-9]+)*")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercased word tokens. Identifiers such as `s3_put_object` are kept whole and also
+    split into their parts, so both the exact name and its words match.
+    """
+    tokens = []
+    for token in _TOKEN.findall((text or "").lower()):
+        tokens.append(token)
+        if "_" in token or "-" in token:
+            tokens.extend(re.split(r"[_-]", token))
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 inverted index over the embedded text of each matrix row.
+
+    Postings are only appended to, so a reader holding a snapshot of `size` rows can score
+    while a writer adds rows (rows >= size are ignored). Corpus statistics include rows
+    that were tombstoned since the last rebuild, which only slightly shifts the scores.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        # term -> rows containing it, and the term frequency in each
+        self._rows: Dict[str, List[int]] = {}
+        self._tfs: Dict[str, List[int]] = {}
+        self._doc_len: List[int] = []
+        self._total_len = 0
+
+    def add(self, rows: Iterable[int], texts: Iterable[Optional[str]]) -> None:
+        for row, text in zip(rows, texts):
+            tokens = tokenize(text)
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            row = int(row)
+            if row >= len(self._doc_len):
+                self._doc_len.extend([0] * (row + 1 - len(self._doc_len)))
+            self._doc_len[row] = len(tokens)
+            self._total_len += len(tokens)
+            for term, tf in counts.items():
+                self._rows.setdefault(term, []).append(row)
+                self._tfs.setdefault(term, []).append(tf)
+
+    def scores(self, text: str, size: int) -> np.ndarray:
+        """BM25 score of the query `text` against each of the first `size` rows."""
+        out = np.zeros(size, dtype=np.float32)
+        n_docs = len(self._doc_len)
+        if not n_docs or not size:
+            return out
+        doc_len = np.array(self._doc_len[:size], dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * doc_len / max(self._total_len / n_docs, 1e-9))
+        query_terms: Dict[str, int] = {}
+        for token in tokenize(text):
+            query_terms[token] = query_terms.get(token, 0) + 1
+        for term, qtf in query_terms.items():
+            rows, tfs = self._rows.get(term), self._tfs.get(term)
+            if not rows:
+                continue
+            n = min(len(rows), len(tfs))
+            idf = math.log(1 + (n_docs - n + 0.5) / (n + 0.5))
+            rows_arr = np.array(rows[:n], dtype=np.int64)
+            tfs_arr = np.array(tfs[:n], dtype=np.float32)
+            visible = rows_arr < size
+            rows_arr, tfs_arr = rows_arr[visible], tfs_arr[visible]
+            out[rows_arr] += qtf * idf * tfs_arr * (self.k1 + 1) / (tfs_arr + norm[rows_arr])
+        return out
@@ -1,33 +1,28 @@
 # Copyright (c) Praneeth Vadlapati
 
+# The chat model and embedding client are built on first use (get_llm / get_embeddings),
+# so importing tool_see has no side effects: no .env loading, no OpenAI clients and no
+# llm_cache.db created in the working directory.
+
 import os
-from typing import Callable, List, Optional
+import threading
+from typing import Any, Callable, Dict, List, Optional
 
-from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI #, OpenAIEmbeddings
 from langchain_core.embeddings import Embeddings
-from langchain_community.cache import SQLiteCache
-import openai
-
-load_dotenv()
-
-
-llm = ChatOpenAI(
-    model=os.getenv("OPENAI_MODEL", ""),
-    reasoning_effort="medium",
-    max_retries=3,
-#     api_key=lambda: api_key,
-#     base_url=base_url,
-    cache=SQLiteCache(database_path="llm_cache.db"),
-)
 
 
 class OpenAIEmbeddings(Embeddings):
     def __init__(self, api_key: Callable, base_url: Optional[str], model: str):
+        import openai
+
         self.embedding_client = openai.OpenAI(
             api_key=api_key(),
             base_url=base_url,
         )
+        self.async_embedding_client = openai.AsyncOpenAI(
+            api_key=api_key(),
+            base_url=base_url,
+        )
         self.model = model
 
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
@@ -41,9 +36,117 @@ class OpenAIEmbeddings(Embeddings):
     def embed_query(self, text: str):
         return self.embed_documents([str(text)])[0]
 
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        result = await self.async_embedding_client.embeddings.create(
+            input=texts,
+            model=self.model,
+        )
+        return [value.embedding for value in result.data]
+
+    async def aembed_query(self, text: str):
+        return (await self.aembed_documents([str(text)]))[0]
+
+
+# setting -> (environment variable, default)
+_SETTINGS = {
+    "model": ("OPENAI_MODEL", ""),
+    "llm_cache_path": (None, "llm_cache.db"),
+    "embed_model": ("EMBED_MODEL", ""),
+    "embed_api_key": ("EMBED_API_KEY", ""),
+    "embed_api_base": ("EMBED_API_BASE", None),
+}
+_overrides: Dict[str, Any] = {}
+_lock = threading.RLock()
+_env_loaded = False
+_llm = None
+_embeddings: Optional[Embeddings] = None
+
+
+def _load_env():
+    # once, before building a client: the clients also read the environment themselves
+    # (e.g. ChatOpenAI reads OPENAI_API_KEY), whatever settings are overridden
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _env_loaded = True
+
+
+def _setting(name: str):
+    if name in _overrides:
+        return _overrides[name]
+    _load_env()
+    env, default = _SETTINGS[name]
+    return os.getenv(env, default) if env else default
+
+
+def configure(llm=None, embeddings: Optional[Embeddings] = None, **settings):
+    """Configure the shared chat model and embeddings before (or instead of) building them.
+
+    `llm` / `embeddings` replace the clients outright. Keyword settings override the
+    environment (and `.env`) for the clients built next:
+      - model: chat model name (OPENAI_MODEL)
+      - llm_cache_path: SQLite cache of LLM responses (default "llm_cache.db"; None disables it)
+      - embed_model, embed_api_key, embed_api_base: embedding endpoint (EMBED_MODEL,
+        EMBED_API_KEY, EMBED_API_BASE)
+    A client already built is discarded when its settings change.
+    """
+    unknown = sorted(set(settings) - set(_SETTINGS))
+    if unknown:
+        raise TypeError(f"configure() got unknown settings: {unknown}")
+    global _llm, _embeddings
+    with _lock:
+        _overrides.update(settings)
+        if llm is not None or {"model", "llm_cache_path"} & set(settings):
+            _llm = llm
+        if embeddings is not None or {"embed_model", "embed_api_key", "embed_api_base"} & set(
+            settings
+        ):
+            _embeddings = embeddings
+
+
+def get_llm():
+    """The shared chat model, built on first use."""
+    global _llm
+    with _lock:
+        if _llm is None:
+            _load_env()
+            from langchain_openai import ChatOpenAI
+
+            cache = None
+            cache_path = _setting("llm_cache_path")
+            if cache_path:
+                from langchain_community.cache import SQLiteCache
+
+                cache = SQLiteCache(database_path=cache_path)
+            _llm = ChatOpenAI(
+                model=_setting("model"),
+                reasoning_effort="medium",
+                max_retries=3,
+                cache=cache,
+            )
+        return _llm
+
+
+def get_embeddings() -> Embeddings:
+    """The shared embeddings client, built on first use."""
+    global _embeddings
+    with _lock:
+        if _embeddings is None:
+            _load_env()
+            _embeddings = OpenAIEmbeddings(
+                api_key=lambda: _setting("embed_api_key"),
+                model=_setting("embed_model"),
+                base_url=_setting("embed_api_base"),
+            )
+        return _embeddings
+
 
-embeddings = OpenAIEmbeddings(
-    api_key=lambda: os.getenv("EMBED_API_KEY", ""),
-    model=os.getenv("EMBED_MODEL", ""),
-    base_url=os.getenv("EMBED_API_BASE"),
-)
+def __getattr__(name: str):
+    # Backwards compatibility for `from tool_see.utils.llm_utils import llm, embeddings`
+    if name == "llm":
+        return get_llm()
+    if name == "embeddings":
+        return get_embeddings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
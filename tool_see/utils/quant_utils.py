@@ -0,0 +1,114 @@
+from typing import Iterable, Optional
+
+import numpy as np
+
+
+# Rows are decoded/scored in cache-sized chunks so scoring never materializes a float32
+# copy of the store
+_CHUNK = 1024
+
+
+class ScalarQuantizedMatrix:
+    """Quantized copy of the rows of an `EmbeddingMatrix`, used for cheaper exact scans.
+
+    - "float16": half-precision rows (2 bytes per dimension); numpy has no fast float16
+      matmul, so this saves memory but scans slower than float32
+    - "int8": one byte per dimension with a per-dimension scale and offset fitted on the
+      stored rows (x ~= (code + 128) * scale + offset)
+
+    Scoring is a dot product against the codes: for int8 the query is folded into the
+    scales, so q.x = (q * scale).code + q.(128 * scale + offset). The fit is refreshed
+    whenever the number of rows doubles, or on demand with `fit()`; values outside the
+    fitted range are clipped until then.
+    """
+
+    DTYPES = ("float16", "int8")
+
+    def __init__(self, dtype: str = "int8"):
+        if dtype not in self.DTYPES:
+            raise ValueError(f"unknown quantization: {dtype} (expected one of {self.DTYPES})")
+        self.dtype = dtype
+        self._codes: Optional[np.ndarray] = None
+        self._size = 0
+        self._scale: Optional[np.ndarray] = None
+        self._offset: Optional[np.ndarray] = None
+        self._fitted_size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the codes of the stored rows."""
+        return 0 if self._codes is None else int(self._codes[: self._size].nbytes)
+
+    def fit(self, vectors: np.ndarray) -> None:
+        """Re-fit the int8 ranges on all stored rows and re-encode them."""
+        size = min(self._size, vectors.shape[0])
+        if self._codes is None or size == 0:
+            return
+        if self.dtype == "int8" and size:
+            lo = np.full(vectors.shape[1], np.inf, dtype=np.float32)
+            hi = np.full(vectors.shape[1], -np.inf, dtype=np.float32)
+            for start in range(0, size, _CHUNK):
+                chunk = vectors[start : min(start + _CHUNK, size)]
+                lo = np.minimum(lo, chunk.min(axis=0))
+                hi = np.maximum(hi, chunk.max(axis=0))
+            self._scale = np.maximum((hi - lo) / 255.0, 1e-8).astype(np.float32)
+            self._offset = lo.astype(np.float32)
+        self._fitted_size = size
+        # re-encode into a new buffer: the old one may still be read through a snapshot
+        codes = np.zeros_like(self._codes)
+        for start in range(0, size, _CHUNK):
+            rows = np.arange(start, min(start + _CHUNK, size))
+            codes[rows] = self._encode(vectors[rows])
+        self._codes = codes
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        if self.dtype == "float16":
+            return vectors.astype(np.float16)
+        codes = np.rint((vectors - self._offset) / self._scale) - 128
+        return np.clip(codes, -128, 127).astype(np.int8)
+
+    def add(self, vectors: np.ndarray, rows: Iterable[int]) -> None:
+        """Encode the new `rows` of `vectors`."""
+        rows = np.fromiter((int(r) for r in rows), dtype=np.int64)
+        if not len(rows):
+            return
+        size = max(self._size, int(rows.max()) + 1)
+        capacity = 0 if self._codes is None else self._codes.shape[0]
+        if size > capacity:
+            codes = np.zeros(
+                (max(size, capacity * 2, 16), vectors.shape[1]),
+                dtype=np.float16 if self.dtype == "float16" else np.int8,
+            )
+            if self._codes is not None:
+                codes[:capacity] = self._codes
+            self._codes = codes
+        self._size = size
+        if self.dtype == "int8" and (self._scale is None or size >= 2 * self._fitted_size):
+            self.fit(vectors)
+        else:
+            for start in range(0, len(rows), _CHUNK):
+                chunk = rows[start : start + _CHUNK]
+                self._codes[chunk] = self._encode(vectors[chunk])
+
+    def remap(self, keep: np.ndarray) -> None:
+        """Keep only the rows in `keep` (old row of each new row), renumbered."""
+        keep = keep[keep < self._size]
+        if self._codes is not None:
+            self._codes = self._codes[keep]
+        self._size = len(keep)
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Approximate dot products of the normalized `query` with every stored row."""
+        out = np.empty(self._size, dtype=np.float32)
+        if self.dtype == "int8":
+            weights = (query * self._scale).astype(np.float32)
+            bias = float(query @ (128.0 * self._scale + self._offset))
+        else:
+            weights, bias = query.astype(np.float32), 0.0
+        for start in range(0, self._size, _CHUNK):
+            chunk = self._codes[start : min(start + _CHUNK, self._size)]
+            out[start : start + len(chunk)] = chunk.astype(np.float32) @ weights + bias
+        return out
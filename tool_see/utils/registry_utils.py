@@ -0,0 +1,159 @@
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+import importlib
+import threading
+
+
+def function_path(func: Callable) -> Optional[str]:
+    """Import path ("module:qualname") that resolves back to `func`, or None if there is none
+    (lambdas, nested functions, or objects not reachable from their module).
+    """
+    module = getattr(func, "__module__", None)
+    qualname = getattr(func, "__qualname__", None)
+    if not module or not qualname or "<" in qualname:
+        return None
+    path = f"{module}:{qualname}"
+    try:
+        if _import_path(path) is func:
+            return path
+    except Exception:
+        pass
+    return None
+
+
+def _split_path(path: str) -> Tuple[str, str]:
+    """(module, qualname) of "package.module:Attr.attr" (or "package.module.attr")."""
+    if ":" in path:
+        module_name, _, qualname = path.partition(":")
+    else:
+        module_name, _, qualname = path.rpartition(".")
+    if not module_name or not qualname:
+        raise ValueError(f"not a registered key or an import path: {path!r}")
+    return module_name, qualname
+
+
+def _import_path(path: str) -> Any:
+    """Import "package.module:Attr.attr" (or "package.module.attr")."""
+    module_name, qualname = _split_path(path)
+    obj: Any = importlib.import_module(module_name)
+    for attr in qualname.split("."):
+        obj = getattr(obj, attr)
+    return obj
+
+
+class ToolRegistry:
+    """Resolves the `function_ref` of stored tool metadata to callables, only when needed.
+
+    A reference is either a key registered with `register` (e.g. a tool id, for functions
+    that cannot be imported by path) or an import path "module:qualname", imported on
+    first use and cached. Stores then only persist the reference, so a process can restore
+    a large catalog without importing the module of every tool up front.
+
+    Stored references are data, so import paths are only resolved under the module
+    prefixes in `allowed_modules` (e.g. ["my_tools"] allows "my_tools.billing:refund");
+    by default only registered keys resolve, and a store cannot turn e.g. "os:system"
+    into an agent tool.
+    """
+
+    def __init__(self, allowed_modules: Iterable[str] = ()):
+        self._functions: Dict[str, Callable] = {}
+        self._allowed_modules = set(allowed_modules)
+        self._lock = threading.Lock()
+
+    def __contains__(self, ref: str) -> bool:
+        return ref in self._functions
+
+    def register(self, ref: str, func: Optional[Callable] = None):
+        """Register `func` under `ref`; without `func`, returns a decorator."""
+        if func is None:
+            return lambda f: self.register(ref, f)
+        if not callable(func):
+            raise TypeError(f"ToolRegistry.register: {ref!r} is not callable")
+        with self._lock:
+            self._functions[ref] = func
+        return func
+
+    def unregister(self, ref: str) -> None:
+        with self._lock:
+            self._functions.pop(ref, None)
+
+    def allow_modules(self, *prefixes: str) -> None:
+        """Allow import paths under the modules (or packages) `prefixes` to be resolved."""
+        with self._lock:
+            self._allowed_modules.update(prefixes)
+
+    def _is_allowed(self, module_name: str) -> bool:
+        return any(
+            module_name == prefix or module_name.startswith(prefix + ".")
+            for prefix in self._allowed_modules
+        )
+
+    def resolve(self, ref: Optional[str]) -> Optional[Callable]:
+        """Callable for `ref`, or None if it is neither registered nor an importable path
+        under the allowed modules.
+        """
+        if not ref:
+            return None
+        func = self._functions.get(ref)
+        if func is not None:
+            return func
+        try:
+            if not self._is_allowed(_split_path(ref)[0]):
+                print(
+                    f"ToolRegistry: {ref!r} is not registered and its module is not allowed"
+                    " (see ToolRegistry.allow_modules)"
+                )
+                return None
+            func = _import_path(ref)
+        except Exception as e:
+            print(f"ToolRegistry: could not resolve {ref!r}: {e}")
+            return None
+        if not callable(func):
+            print(f"ToolRegistry: {ref!r} is not callable")
+            return None
+        with self._lock:
+            self._functions.setdefault(ref, func)
+        return func
+
+    def split_metadata(self, tool_id: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Serializable copy of `metadata`: a callable "function" is replaced by its
+        "function_ref" (its import path, else `tool_id`, registered here under that
+        reference), and a string "function" is taken as the reference itself.
+        """
+        func = metadata.get("function")
+        if func is None:
+            return metadata
+        stored = {k: v for k, v in metadata.items() if k != "function"}
+        if isinstance(func, str):
+            stored["function_ref"] = func
+        elif callable(func):
+            # the caller handed over this callable, so its reference resolves in this
+            # process; another process needs its module allowed (or to register it again)
+            ref = function_path(func) or tool_id
+            self.register(ref, func)
+            stored["function_ref"] = ref
+        return stored
+
+
+# process-wide registry used by ToolMemory and create_tool unless one is passed
+default_registry = ToolRegistry()
+
+
+def register_tool_function(ref: str, func: Optional[Callable] = None):
+    """Register `func` under `ref` in the default registry (usable as a decorator)."""
+    return default_registry.register(ref, func)
+
+
+def allow_tool_modules(*prefixes: str) -> None:
+    """Allow the default registry to import tool functions under the modules `prefixes`."""
+    default_registry.allow_modules(*prefixes)
+
+
+def resolve_function(
+    metadata: Dict[str, Any], registry: Optional[ToolRegistry] = None
+) -> Tuple[Optional[Callable], Optional[str]]:
+    """(callable, reference) of tool `metadata`: a live "function" is used as is."""
+    func = metadata.get("function")
+    if callable(func):
+        return func, None
+    ref = metadata.get("function_ref") or (func if isinstance(func, str) else None)
+    return (registry or default_registry).resolve(ref), ref
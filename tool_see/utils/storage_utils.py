@@ -0,0 +1,229 @@
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import os
+import uuid
+
+import numpy as np
+
+
+# Binary store layout (a directory):
+#   embeddings-<generation>.npy : float32 matrix, one normalized row per tool (memory-mappable)
+#   tools.json     : compact sidecar with the ids (row order), metadata, embedded texts,
+#                    token costs and the generation of the embeddings file to use
+#   wal.jsonl      : write-ahead log of changes made since the snapshot above
+#   index.npz      : ANN index over the snapshot rows (if the store uses one)
+# A JSON store keeps these next to it, in "<path>.wal" and "<path>.index.npz".
+# Each save writes a new generation and commits it by replacing tools.json, so a crash
+# mid-save leaves the previous snapshot intact. The index records the id of the snapshot it
+# was built for (the generation, or the sha256 of a JSON snapshot) and is ignored, to be
+# rebuilt, when it does not match.
+EMBEDDINGS_FILE = "embeddings.npy"  # format version 1, before generations
+TOOLS_FILE = "tools.json"
+WAL_FILE = "wal.jsonl"
+INDEX_FILE = "index.npz"
+BINARY_FORMAT_VERSION = 2
+
+
+def is_binary_store(path: str) -> bool:
+    return os.path.isdir(path)
+
+
+def snapshot_exists(path: str, binary: bool) -> bool:
+    return os.path.exists(os.path.join(path, TOOLS_FILE) if binary else path)
+
+
+def wal_path(path: str, binary: bool) -> str:
+    return os.path.join(path, WAL_FILE) if binary else path + ".wal"
+
+
+def index_path(path: str, binary: bool) -> str:
+    return os.path.join(path, INDEX_FILE) if binary else path + ".index.npz"
+
+
+def new_generation() -> str:
+    return uuid.uuid4().hex
+
+
+def snapshot_digest(data: bytes) -> str:
+    """Snapshot id of a JSON snapshot with contents `data`."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def save_index(path: str, state: Dict[str, np.ndarray], snapshot_id: str) -> None:
+    """Write the index `state` built over the rows of snapshot `snapshot_id`."""
+    _replace_atomically(path, lambda f: np.savez(f, snapshot=np.array(snapshot_id), **state))
+
+
+def load_index(path: str, snapshot_id: Optional[str]) -> Optional[Dict[str, np.ndarray]]:
+    """The saved index state, or None if missing or saved for another snapshot."""
+    if not os.path.exists(path) or snapshot_id is None:
+        return None
+    with np.load(path) as data:
+        if "snapshot" not in data.files or str(data["snapshot"]) != snapshot_id:
+            print(f"ToolMemory: ignoring index {path}: it belongs to another snapshot.")
+            return None
+        return {key: data[key] for key in data.files if key != "snapshot"}
+
+
+def remove_index(path: str) -> None:
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def append_wal(path: str, records: List[Dict[str, Any]]) -> None:
+    """Append `records` to the write-ahead log at `path`, one JSON object per line."""
+    if not records:
+        return
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    _truncate_torn_tail(path)
+    data = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _truncate_torn_tail(path: str) -> None:
+    # Drop a partial last line (left by a crash mid-append) so new records start on a fresh line.
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return
+        f.seek(0)
+        data = f.read()
+        f.truncate(data.rfind(b"\n") + 1)
+
+
+def read_wal(path: str) -> List[Dict[str, Any]]:
+    """Read the write-ahead log at `path` (empty if missing).
+    A torn last line, left by a crash during an append, is ignored.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    records = []
+    for i, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            if i == len(lines) - 1:
+                break
+            raise
+    return records
+
+
+def remove_wal(path: str) -> None:
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def _fsync_dir(path: str) -> None:
+    # Persist a rename in `path`; not supported on every platform (e.g. Windows).
+    try:
+        fd = os.open(path or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _replace_atomically(dest: str, write) -> None:
+    """Write `dest` through a temporary file that is fsynced before it replaces `dest`."""
+    tmp = dest + ".tmp"
+    with open(tmp, "wb") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, dest)
+    _fsync_dir(os.path.dirname(dest))
+
+
+def save_json(path: str, data: bytes) -> None:
+    """Atomically write the JSON snapshot `data` (see `snapshot_digest`)."""
+    _replace_atomically(path, lambda f: f.write(data))
+
+
+def _embeddings_file(generation: Optional[str]) -> str:
+    return f"embeddings-{generation}.npy" if generation else EMBEDDINGS_FILE
+
+
+def save_binary(
+    path: str,
+    ids: List[str],
+    vectors: np.ndarray,
+    entries: List[Dict[str, Any]],
+    generation: str,
+) -> None:
+    """Write a binary store to directory `path` as snapshot `generation`.
+    `entries` are the store entries ({"metadata": ..., "text": ..., "tokens": ...}) in row
+    order. The snapshot is committed by atomically replacing tools.json; the embeddings of
+    older generations are removed afterwards.
+    """
+    os.makedirs(path, exist_ok=True)
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    sidecar = {
+        "format_version": BINARY_FORMAT_VERSION,
+        "generation": generation,
+        "dim": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+        "ids": ids,
+        "metadata": [e["metadata"] for e in entries],
+        "texts": [e.get("text") for e in entries],
+        "tokens": [e.get("tokens") for e in entries],
+    }
+    embeddings_file = _embeddings_file(generation)
+    _replace_atomically(os.path.join(path, embeddings_file), lambda f: np.save(f, vectors))
+    _replace_atomically(
+        os.path.join(path, TOOLS_FILE),
+        lambda f: f.write(json.dumps(sidecar, separators=(",", ":")).encode("utf-8")),
+    )
+    for name in os.listdir(path):
+        if name.startswith("embeddings") and name.endswith(".npy") and name != embeddings_file:
+            try:
+                os.remove(os.path.join(path, name))
+            except OSError:
+                pass  # e.g. still memory-mapped on Windows; removed by a later save
+
+
+def load_binary(
+    path: str, mmap: bool = True
+) -> Tuple[List[str], np.ndarray, List[Dict[str, Any]], Optional[str]]:
+    """Read a binary store from directory `path`, returning (ids, vectors, entries,
+    generation). With `mmap=True` the embeddings are memory-mapped read-only, so loading
+    is near-instant and the pages are shared through the OS page cache between processes.
+    """
+    with open(os.path.join(path, TOOLS_FILE), encoding="utf-8") as f:
+        sidecar = json.load(f)
+    version = sidecar.get("format_version")
+    if version not in (1, BINARY_FORMAT_VERSION):
+        raise ValueError(f"unsupported binary store format version: {version}")
+    generation = sidecar.get("generation")
+    vectors = np.load(
+        os.path.join(path, _embeddings_file(generation)), mmap_mode="r" if mmap else None
+    )
+    ids = sidecar["ids"]
+    if vectors.shape[0] != len(ids):
+        raise ValueError(
+            f"binary store is inconsistent: {len(ids)} ids but {vectors.shape[0]} embeddings"
+        )
+    texts = sidecar.get("texts") or [None] * len(ids)
+    tokens = sidecar.get("tokens") or [None] * len(ids)
+    entries = [
+        {"metadata": m, "text": t, "tokens": n}
+        for m, t, n in zip(sidecar["metadata"], texts, tokens)
+    ]
+    return ids, vectors, entries, generation
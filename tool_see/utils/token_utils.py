@@ -0,0 +1,61 @@
+from typing import Any, Dict
+import threading
+
+
+# Tool definitions are counted as `str(metadata)` with tiktoken's o200k_harmony encoding,
+# as in the evaluation benchmarks. tiktoken is optional (and downloads the encoding on first
+# use), so without it, or if the download takes longer than LOAD_TIMEOUT seconds, the count
+# is estimated from the text length.
+ENCODING_NAME = "o200k_harmony"
+LOAD_TIMEOUT = 10.0
+# average characters per token of English text and JSON-like tool schemas
+CHARS_PER_TOKEN = 4
+
+_encoding: Any = None
+_loaded = False
+_lock = threading.Lock()
+
+
+def _load(result: Dict[str, Any]):
+    try:
+        import tiktoken
+
+        result["encoding"] = tiktoken.get_encoding(ENCODING_NAME)
+    except Exception as e:
+        result["error"] = type(e).__name__
+
+
+def load_encoding():
+    """The tiktoken encoding, loaded once (None if unavailable: counts are estimated)."""
+    global _encoding, _loaded
+    if not _loaded:
+        with _lock:
+            if not _loaded:
+                # tiktoken's download has no timeout, so it runs in a daemon thread that is
+                # abandoned if too slow; counts stay estimated for the rest of the process
+                result: Dict[str, Any] = {"error": "TimeoutError"}
+                thread = threading.Thread(target=_load, args=(result,), daemon=True)
+                thread.start()
+                thread.join(LOAD_TIMEOUT)
+                _encoding = result.get("encoding")
+                if _encoding is None:
+                    print(
+                        f"token_utils: tiktoken {ENCODING_NAME} unavailable ({result['error']}),"
+                        f" estimating {CHARS_PER_TOKEN} characters per token."
+                    )
+                _loaded = True
+    return _encoding
+
+
+def count_tokens(text: Any) -> int:
+    """Number of tokens of `str(text)`."""
+    text = str(text)
+    encoding = load_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def tool_token_cost(metadata: Dict[str, Any]) -> int:
+    """Tokens taken by the definition of a tool with `metadata` in a prompt."""
+    return count_tokens(metadata)
@@ -1,33 +1,417 @@
-from typing import Callable, Dict, List, Optional, Any, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, List, NamedTuple, Optional, Any, Tuple
+import copy
+import itertools
 import json
-import math
+import os
+import threading
 
-from langchain.tools import tool, BaseTool
+from langchain_core.embeddings import Embeddings
+import numpy as np
 
-from tool_see.utils.llm_utils import embeddings
+from tool_see.utils.ann_utils import index_from_state, make_index
+from tool_see.utils.cache_utils import (
+    EmbeddingCache,
+    LRUCache,
+    SemanticCache,
+    freeze,
+    normalize_query,
+)
+from tool_see.utils.embed_utils import aembed_documents_chunked, embed_documents_chunked
+from tool_see.utils.filter_utils import MetadataIndex
+from tool_see.utils.lexical_utils import BM25Index
+from tool_see.utils.llm_utils import get_embeddings
+from tool_see.utils.quant_utils import ScalarQuantizedMatrix
+from tool_see.utils.registry_utils import ToolRegistry, default_registry, resolve_function
+from tool_see.utils.token_utils import tool_token_cost
+from tool_see.utils.storage_utils import (
+    append_wal,
+    index_path,
+    is_binary_store,
+    load_binary,
+    load_index,
+    new_generation,
+    read_wal,
+    remove_index,
+    remove_wal,
+    save_binary,
+    save_index,
+    save_json,
+    snapshot_digest,
+    snapshot_exists,
+    wal_path,
+)
+from tool_see.utils.vector_utils import EmbeddingMatrix, normalize_rows, top_k_indices
+
+if TYPE_CHECKING:
+    from langchain.tools import BaseTool
+
+
+# distinguishes ToolMemory instances in cache keys (unlike id(), never reused)
+_memory_uids = itertools.count()
+
+
+class _Snapshot(NamedTuple):
+    """Read-only view of a ToolMemory, published to readers by a single assignment.
+    Rows below `vectors.shape[0]` never change; `ids` and `entries` are only appended to.
+    """
+
+    ids: List[str]  # tool id of each matrix row
+    entries: List[Dict[str, Any]]  # {"metadata", "text"} of each matrix row
+    vectors: np.ndarray
+    alive: Optional[np.ndarray]  # row mask, when some rows are tombstoned
+    n_dead: int
+    index: Any
+    quantized: Optional[ScalarQuantizedMatrix]
+    metadata_index: Optional[MetadataIndex]
+    lexical: Optional[BM25Index]
+    version: int
+
+    @property
+    def n_tools(self) -> int:
+        return self.vectors.shape[0] - self.n_dead
+
+    def mask(self, scores: np.ndarray) -> np.ndarray:
+        """Set the scores of tombstoned rows (last axis) to -inf."""
+        if self.alive is not None:
+            scores[..., ~self.alive] = -np.inf
+        return scores
+
+    def live(self, rows: np.ndarray, scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Drop tombstoned `rows` and their `scores`."""
+        if self.alive is None:
+            return rows, scores
+        keep = self.alive[rows]
+        return rows[keep], scores[keep]
 
 
 class ToolMemory:
     """In-memory storage for tool embeddings and full metadata.
-    This avoids using a vector DB by keeping embeddings and metadata in a Python dict.
-    Persist/restore is supported via JSON file (embeddings are stored as lists).
+    This avoids using a vector DB: metadata is kept in a Python dict and embeddings in
+    one contiguous, pre-normalized float32 matrix, so a query is a single matrix-vector product.
+    Persist/restore is supported via JSON file or a memory-mapped binary directory, plus a
+    write-ahead log. Safe to share between threads: queries read the latest published snapshot.
     """
 
-    def __init__(self, persist_path: Optional[str] = None):
+    def __init__(
+        self,
+        persist_path: Optional[str] = None,
+        storage_format: str = "json",
+        compact_threshold: Optional[int] = 1000,
+        query_cache_size: int = 1024,
+        query_cache_ttl: Optional[float] = None,
+        embedding_cache_path: Optional[str] = None,
+        embedding_model: Optional[str] = None,
+        embed_batch_size: int = 256,
+        embed_max_workers: int = 4,
+        embed_max_retries: int = 2,
+        index: str = "exact",
+        index_params: Optional[Dict[str, Any]] = None,
+        quantization: Optional[str] = None,
+        rescore_factor: int = 4,
+        resident_vectors: Optional[bool] = None,
+        filter_keys: Optional[List[str]] = None,
+        lexical_index: bool = False,
+        fusion: str = "rrf",
+        fusion_alpha: float = 0.5,
+        rrf_k: int = 60,
+        embeddings: Optional[Embeddings] = None,
+        registry: Optional[ToolRegistry] = None,
+        semantic_cache_size: int = 0,
+        semantic_cache_threshold: float = 0.95,
+    ):
+        if storage_format not in ("json", "binary"):
+            raise ValueError(f"unknown storage_format: {storage_format}")
+        if fusion not in ("rrf", "weighted"):
+            raise ValueError(f"unknown fusion: {fusion}")
+        # "json": one file with embeddings as lists; "binary": a directory with a raw float32
+        # .npy matrix (memory-mapped read-only on load) and a JSON sidecar for the metadata
         self.persist_path = persist_path
-        # internal store: tool_id -> {"metadata": {...}, "embedding": [...float]}
+        self.storage_format = storage_format
+        # texts are embedded with any LangChain Embeddings (default: llm_utils' endpoint)
+        self._embeddings = embeddings
+        # resolves the "function_ref" of stored metadata to callables
+        self.registry = registry or default_registry
+        # changes are appended to a write-ahead log; it is folded into a new snapshot once it
+        # holds compact_threshold records and at least as many records as there are tools
+        self.compact_threshold = compact_threshold
+        # add_tools embeds in chunks of embed_batch_size, retrying failed chunks
+        self.embed_batch_size = embed_batch_size
+        self.embed_max_workers = embed_max_workers
+        self.embed_max_retries = embed_max_retries
+        # internal store: tool_id -> {"metadata": {...}, "text": "<embedded text>",
+        #                             "tokens": <token cost of the metadata>}
         self._store: Dict[str, Dict[str, Any]] = {}
+        # embeddings: one normalized row per tool_id, and the store entry of each row
+        # keep the float32 rows in process memory, or only in memory-mapped files: by
+        # default only when no compact copy (quantized codes or PQ codes) is scanned instead
+        if resident_vectors is None:
+            resident_vectors = quantization is None and index != "pq"
+        self.resident_vectors = resident_vectors
+        self._matrix = self._new_matrix()
+        self._entries: List[Dict[str, Any]] = []
+        # optional ANN index over the matrix rows ("exact": brute-force scoring); index_params:
+        # hnsw: M, ef_construction, ef_search; ivf: nlist, nprobe, auto_train_size;
+        # pq: m, nbits, rerank, auto_train_size (retrain ivf/pq with train_index())
+        self.index_kind = index
+        self.index_params = index_params
+        self._index = make_index(index, index_params)
+        # optional float16/int8 copy of the matrix for exact scans; the best
+        # top_k * rescore_factor candidates are re-scored on the float32 rows (0: never)
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        self._quantized = ScalarQuantizedMatrix(quantization) if quantization else None
+        # optional inverted index over the metadata fields in filter_keys
+        self.filter_keys = filter_keys
+        self._metadata_index: Optional[MetadataIndex] = None
+        # optional BM25 index over the embedded tool texts, for lexical and hybrid queries
+        self.lexical_index = lexical_index
+        self.fusion = fusion
+        self.fusion_alpha = fusion_alpha
+        self.rrf_k = rrf_k
+        self._lexical: Optional[BM25Index] = None
+        self._rebuild_entry_indexes()
+        # number of records in the write-ahead log of persist_path
+        self._wal_records = 0
+        # query embeddings by (model, normalized query text); 0 disables it, ttl in seconds
+        self.query_cache: Optional[LRUCache] = (
+            LRUCache(query_cache_size, query_cache_ttl) if query_cache_size else None
+        )
+        # dense query results reused for near-duplicate queries until the catalog changes
+        self.semantic_cache: Optional[SemanticCache] = (
+            SemanticCache(semantic_cache_size, semantic_cache_threshold)
+            if semantic_cache_size
+            else None
+        )
+        # names the embedding model in cache keys (default: the backend's model or model_name);
+        # without a model name the disk cache of tool embeddings is not used
+        self.embedding_model = embedding_model
+        self.embedding_cache: Optional[EmbeddingCache] = (
+            EmbeddingCache(embedding_cache_path) if embedding_cache_path else None
+        )
+        # writers hold the lock; readers only use the published snapshot
+        self._lock = threading.RLock()
+        # caches of query results are keyed by (uid, version); version grows on every publish
+        self.uid = next(_memory_uids)
+        self.version = 0
+        self._publish()
         if persist_path:
             try:
                 self.load(persist_path)
             except Exception:
                 print(f"ToolMemory: could not load from {persist_path}, starting fresh.")
+                self._reset()
+                self._publish()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        """The embeddings backend; defaults to the shared OpenAI-compatible client of
+        `llm_utils.get_embeddings()`, built when first needed.
+        """
+        if self._embeddings is None:
+            self._embeddings = get_embeddings()
+        return self._embeddings
+
+    def _model_key(self) -> Optional[str]:
+        """Name of the embedding model, for cache keys; None if it cannot be identified."""
+        if self.embedding_model:
+            return self.embedding_model
+        for attr in ("model", "model_name"):
+            name = getattr(self.embeddings, attr, None)
+            if isinstance(name, str) and name:
+                return name
+        return None
 
     def add_tools(
         self,
         tools: List[Tuple[str, Dict[str, Any]]],
         text_keys: Optional[List[str]] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
     ):
+        """Embed and store `tools` as (tool_id, metadata) pairs.
+        Only new or changed texts are embedded (also looked up in the embedding cache).
+        Texts are embedded in chunks of `embed_batch_size` with up to `embed_max_workers`
+        concurrent requests; `progress_callback(done, total)` reports embedded texts.
+        Tools from chunks that still fail after retries are skipped and a RuntimeError is
+        raised once the others are stored.
+        """
+        tools = self._split_functions(tools)
+        ids, texts = self._tool_texts(tools, text_keys)
+        with self._lock:
+            embs, pending, model = self._known_embeddings(ids, texts)
+        errors: List[Exception] = []
+        if pending:
+            fresh, errors = embed_documents_chunked(
+                self.embeddings,
+                pending,
+                batch_size=self.embed_batch_size,
+                max_workers=self.embed_max_workers,
+                max_retries=self.embed_max_retries,
+                progress_callback=progress_callback,
+            )
+            self._fill_embeddings(embs, texts, pending, fresh, model)
+        self._store_tools(tools, ids, texts, embs, errors)
+
+    async def aadd_tools(
+        self,
+        tools: List[Tuple[str, Dict[str, Any]]],
+        text_keys: Optional[List[str]] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+    ):
+        """Async `add_tools`: chunks are embedded with `aembed_documents`, at most
+        `embed_max_workers` at a time, without blocking the event loop.
+        """
+        tools = self._split_functions(tools)
+        ids, texts = self._tool_texts(tools, text_keys)
+        with self._lock:
+            embs, pending, model = self._known_embeddings(ids, texts)
+        errors: List[Exception] = []
+        if pending:
+            fresh, errors = await aembed_documents_chunked(
+                self.embeddings,
+                pending,
+                batch_size=self.embed_batch_size,
+                max_concurrency=self.embed_max_workers,
+                max_retries=self.embed_max_retries,
+                progress_callback=progress_callback,
+            )
+            self._fill_embeddings(embs, texts, pending, fresh, model)
+        self._store_tools(tools, ids, texts, embs, errors)
+
+    def update_tools(
+        self,
+        tools: List[Tuple[str, Dict[str, Any]]],
+        text_keys: Optional[List[str]] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+    ):
+        """Merge each (tool_id, changes) into the stored metadata of an existing tool.
+        Only tools whose embedded text changes are re-embedded (pass the `text_keys` the
+        tools were added with). Raises KeyError for unknown tool ids.
+        """
+        with self._lock:
+            unknown = [tool_id for tool_id, _ in tools if tool_id not in self._store]
+            if unknown:
+                raise KeyError(f"ToolMemory.update_tools: unknown tool ids: {unknown}")
+            merged = [
+                (tool_id, {**self._store[tool_id]["metadata"], **changes})
+                for tool_id, changes in tools
+            ]
+        self.add_tools(merged, text_keys, progress_callback)
+
+    def remove_tools(self, tool_ids: List[str]) -> int:
+        """Remove tools by id and return how many were removed (unknown ids are ignored).
+        Their matrix rows are tombstoned and dropped at the next snapshot, or once they
+        outnumber the live tools.
+        """
+        with self._lock:
+            removed = self._remove(tool_ids)
+            if removed and self.persist_path:
+                self._log([{"op": "remove", "id": tid} for tid in removed])
+            self._publish()
+        return len(removed)
+
+    def clear(self):
+        """Remove every tool. A persisted store is compacted to an empty snapshot."""
+        with self._lock:
+            self._reset()
+            self._publish()
+            if self.persist_path:
+                self.compact()
+
+    def _remove(self, tool_ids: List[str]) -> List[str]:
+        removed = [tid for tid in dict.fromkeys(tool_ids) if self._store.pop(tid, None)]
+        self._matrix.remove(removed)
+        if self._matrix.n_dead > len(self._matrix):
+            self._purge()
+        return removed
+
+    def _purge(self):
+        """Drop tombstoned rows from the matrix and renumber the index rows to match."""
+        if not self._matrix.n_dead:
+            return
+        keep = self._matrix.compact()
+        self._entries = [self._entries[row] for row in keep.tolist()]
+        self._rebuild_entry_indexes()
+        if self._index is not None:
+            self._index.remap(self._matrix.vectors, keep)
+        if self._quantized is not None:
+            self._quantized.remap(keep)
+
+    def _publish(self):
+        """Publish the current state to readers. Indexes are then copied, so that later
+        writes only append to what the published ones share, and anything else (training,
+        compaction) replaces attributes of the copies.
+        """
+        matrix = self._matrix
+        self._snapshot = _Snapshot(
+            ids=matrix.ids,
+            entries=self._entries,
+            vectors=matrix.vectors,
+            alive=matrix.alive.copy() if matrix.n_dead else None,
+            n_dead=matrix.n_dead,
+            index=self._index,
+            quantized=self._quantized,
+            metadata_index=self._metadata_index,
+            lexical=self._lexical,
+            version=self.version + 1,
+        )
+        # bumped after the snapshot is visible: results seen under a version are never older
+        self.version += 1
+        self._index = copy.copy(self._index)
+        self._quantized = copy.copy(self._quantized)
+
+    def _new_matrix(
+        self, ids: Optional[List[str]] = None, vectors: Optional[np.ndarray] = None
+    ) -> EmbeddingMatrix:
+        """Empty matrix, or one wrapping the normalized `vectors` of `ids`, kept resident
+        or not as configured.
+        """
+        scratch_dir = None
+        if self.storage_format == "binary" and self.persist_path:
+            if os.path.isdir(self.persist_path):
+                scratch_dir = self.persist_path
+        if ids is None:
+            return EmbeddingMatrix(resident=self.resident_vectors, scratch_dir=scratch_dir)
+        return EmbeddingMatrix.from_normalized(ids, vectors, self.resident_vectors, scratch_dir)
+
+    def _reset(self):
+        self._store = {}
+        self._matrix = self._new_matrix()
+        self._entries = []
+        self._index = make_index(self.index_kind, self.index_params)
+        self._quantized = ScalarQuantizedMatrix(self.quantization) if self.quantization else None
+        self._rebuild_entry_indexes()
+
+    def _add_entries(self, rows: np.ndarray, ids: List[str]):
+        """Append the store entries of the new matrix `rows` (one per unique id in `ids`)."""
+        entries = [self._store[tid] for tid in dict.fromkeys(ids)]
+        self._entries.extend(entries)
+        if self._metadata_index is not None:
+            self._metadata_index.add(rows.tolist(), [entry["metadata"] for entry in entries])
+        if self._lexical is not None:
+            self._lexical.add(rows.tolist(), [entry.get("text") for entry in entries])
+
+    def _rebuild_entry_indexes(self):
+        """Rebuild the metadata and BM25 indexes from the row entries."""
+        rows = range(len(self._entries))
+        if self.filter_keys:
+            self._metadata_index = MetadataIndex(self.filter_keys)
+            self._metadata_index.add(rows, [entry["metadata"] for entry in self._entries])
+        if self.lexical_index:
+            self._lexical = BM25Index()
+            self._lexical.add(rows, [entry.get("text") for entry in self._entries])
+
+    def _split_functions(
+        self, tools: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Replace callables in the tool metadata by references, so it stays serializable."""
+        return [
+            (tool_id, self.registry.split_metadata(tool_id, metadata))
+            for tool_id, metadata in tools
+        ]
+
+    def _tool_texts(
+        self, tools: List[Tuple[str, Dict[str, Any]]], text_keys: Optional[List[str]]
+    ) -> Tuple[List[str], List[str]]:
         texts = []
         ids = []
         for tool_id, metadata in tools:
@@ -39,88 +423,639 @@ class ToolMemory:
             parts = [str(metadata.get(k)) for k in keys if metadata.get(k)]
             text = "Tool: " + " \n".join(parts) if parts else json.dumps(metadata)
             texts.append(text)
+        return ids, texts
+
+    def _known_embeddings(
+        self, ids: List[str], texts: List[str]
+    ) -> Tuple[List[Any], List[str], Optional[str]]:
+        """Embeddings that need no API call, so only new or changed texts get embedded.
+        Tools whose text is unchanged keep their stored embedding; other texts are looked
+        up in the embedding cache (if configured).
+        Returns the embeddings (None where unknown), the unique texts still to embed and
+        the embedding model name (None if unknown: the embedding cache is then skipped).
+        """
+        embs: List[Any] = [None] * len(texts)
+        for i, (tool_id, text) in enumerate(zip(ids, texts)):
+            entry = self._store.get(tool_id)
+            if entry is not None and entry.get("text") == text:
+                embs[i] = self._matrix.row(tool_id)
+
+        model = self._model_key()
+        if model is None and self.embedding_cache is not None:
+            print(
+                "ToolMemory: cannot identify the embedding model, so the embedding cache is"
+                " not used; pass embedding_model=... to enable it."
+            )
+        missing = [i for i, emb in enumerate(embs) if emb is None]
+        if missing and self.embedding_cache is not None and model is not None:
+            cached = self.embedding_cache.get_many(model, [texts[i] for i in missing])
+            for i, emb in zip(missing, cached):
+                embs[i] = emb
+            missing = [i for i, emb in enumerate(embs) if emb is None]
+        return embs, list(dict.fromkeys(texts[i] for i in missing)), model
+
+    def _fill_embeddings(
+        self,
+        embs: List[Any],
+        texts: List[str],
+        pending: List[str],
+        fresh: List[Optional[List[float]]],
+        model: Optional[str],
+    ):
+        if self.embedding_cache is not None and model is not None:
+            done = [(t, e) for t, e in zip(pending, fresh) if e is not None]
+            self.embedding_cache.put_many(model, [t for t, _ in done], [e for _, e in done])
+        by_text = dict(zip(pending, fresh))
+        for i, text in enumerate(texts):
+            if embs[i] is None:
+                embs[i] = by_text[text]
+
+    def _store_tools(
+        self,
+        tools: List[Tuple[str, Dict[str, Any]]],
+        ids: List[str],
+        texts: List[str],
+        embs: List[Any],
+        errors: List[Exception],
+    ):
+        failed = 0
+        if errors:
+            ok = [i for i, emb in enumerate(embs) if emb is not None]
+            failed = len(ids) - len(ok)
+            tools = [tools[i] for i in ok]
+            ids, texts, embs = [ids[i] for i in ok], [texts[i] for i in ok], [embs[i] for i in ok]
 
-        try:
-            embs = embeddings.embed_documents(texts)
-        except Exception as e:
-            print("ToolMemory.add_tools: embed_documents failed, trying embed_query:", e)
-            raise e
+        # token costs are counted once here, so token budgets need no per-query tokenization
+        tokens = {i: tool_token_cost(tools[i][1]) for i in self._changed(tools, ids, texts)}
+        with self._lock:
+            # checked again under the lock: another writer may have changed the store since
+            changed = self._changed(tools, ids, texts)
+            if changed:
+                self._write_tools(
+                    [tools[i] for i in changed],
+                    [ids[i] for i in changed],
+                    [texts[i] for i in changed],
+                    [embs[i] for i in changed],
+                    [tokens[i] if i in tokens else tool_token_cost(tools[i][1]) for i in changed],
+                )
+                self._publish()
 
-        for tool_id, metadata, emb in zip(ids, [m for _, m in tools], embs):
-            self._store[tool_id] = {"metadata": metadata, "embedding": list(emb)}
+        if errors:
+            print("ToolMemory.add_tools: embed_documents failed:", errors[0])
+            raise RuntimeError(
+                f"ToolMemory.add_tools: could not embed {failed} of {failed + len(ids)} tools"
+            ) from errors[0]
+
+    def _changed(
+        self, tools: List[Tuple[str, Dict[str, Any]]], ids: List[str], texts: List[str]
+    ) -> List[int]:
+        """Positions of the tools to write: the last one of each id, unless its text and
+        metadata match the stored entry (re-adding a tool as is adds no row, index entry or
+        log record, and publishes no new version).
+        """
+        latest = {tool_id: i for i, tool_id in enumerate(ids)}
+        changed = []
+        for tool_id, i in latest.items():
+            entry = self._store.get(tool_id)
+            if entry is None or entry["text"] != texts[i] or entry["metadata"] != tools[i][1]:
+                changed.append(i)
+        return sorted(changed)
+
+    def _write_tools(
+        self,
+        tools: List[Tuple[str, Dict[str, Any]]],
+        ids: List[str],
+        texts: List[str],
+        embs: List[Any],
+        tokens: List[int],
+    ):
+        rows = self._matrix.upsert(ids, embs)
+        self._index_rows(rows)
+        for tool_id, (_, metadata), text, n in zip(ids, tools, texts, tokens):
+            self._store[tool_id] = {"metadata": metadata, "text": text, "tokens": n}
+        self._add_entries(rows, ids)
+        added = dict.fromkeys(ids)  # unique ids, in the order of their new rows
 
         if self.persist_path:
-            self.save()
-
-    def _cosine(self, a: List[float], b: List[float]) -> float:
-        # Returns cosine similarity between vectors a and b
-        # handle zero vectors defensively
-        dot = 0.0
-        na = 0.0
-        nb = 0.0
-        for x, y in zip(a, b):
-            dot += x * y
-            na += x * x
-            nb += y * y
-        if na == 0 or nb == 0:
-            return 0.0
-        return dot / (math.sqrt(na) * math.sqrt(nb))
+            self._log(
+                [
+                    {
+                        "op": "upsert",
+                        "id": tid,
+                        "metadata": self._store[tid]["metadata"],
+                        "text": self._store[tid]["text"],
+                        "tokens": self._store[tid]["tokens"],
+                        "embedding": self._matrix.row(tid).tolist(),
+                    }
+                    for tid in added
+                ]
+            )
 
     def query(
-        self, query_text: str, top_k: int = 3
+        self,
+        query_text: str,
+        top_k: int = 3,
+        ef_search: Optional[int] = None,
+        nprobe: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        mode: str = "dense",
     ) -> List[Tuple[str, Dict[str, Any], float]]:
         """Query the memory and return top_k tools as (tool_id, metadata, score).
         Score is cosine similarity in [0,1].
+        `ef_search` (HNSW) and `nprobe` (IVF) override the index search breadth for this
+        call; they are ignored by other index types.
+        `filters` only searches tools whose `filter_keys` fields match, e.g.
+        {"namespace": "billing"} (equal to, or contained in a list field) or
+        {"tags": ["a", "b"]} (any of). Matching rows are looked up in the inverted index
+        and scored exactly; if none match, the query is not even embedded.
+        With `lexical_index=True`, `mode="lexical"` ranks by BM25 score without embedding
+        the query, and `mode="hybrid"` fuses the dense and BM25 rankings (see `fusion`);
+        scores are then BM25 or fused scores rather than cosine similarities.
         """
-        query_embed = embeddings.embed_query(query_text)
+        snap = self._snapshot
+        candidates = self._candidates(snap, filters)
+        self._check_mode(snap, mode)
+        if snap.n_tools == 0 or (candidates is not None and not len(candidates)):
+            return []
+        query_embed = None if mode == "lexical" else self._embed_queries([query_text])[0]
+        return self._cached_search(
+            snap,
+            query_text,
+            query_embed,
+            top_k,
+            mode,
+            candidates,
+            filters,
+            ef_search=ef_search,
+            nprobe=nprobe,
+        )
 
-        scores = []
-        for tid, entry in self._store.items():
-            score = self._cosine(query_embed, entry["embedding"])
-            scores.append((tid, entry["metadata"], float(score)))
+    async def aquery(
+        self,
+        query_text: str,
+        top_k: int = 3,
+        ef_search: Optional[int] = None,
+        nprobe: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        mode: str = "dense",
+    ) -> List[Tuple[str, Dict[str, Any], float]]:
+        """Async `query`: the query is embedded with `aembed_query`."""
+        snap = self._snapshot
+        candidates = self._candidates(snap, filters)
+        self._check_mode(snap, mode)
+        if snap.n_tools == 0 or (candidates is not None and not len(candidates)):
+            return []
+        query_embed = None
+        if mode != "lexical":
+            query_embed = (await self._aembed_queries([query_text]))[0]
+        return self._cached_search(
+            snap,
+            query_text,
+            query_embed,
+            top_k,
+            mode,
+            candidates,
+            filters,
+            ef_search=ef_search,
+            nprobe=nprobe,
+        )
 
-        scores.sort(key=lambda x: x[2], reverse=True)
-        return scores[:top_k]
+    def query_many(
+        self,
+        queries: List[str],
+        top_k: int = 3,
+        ef_search: Optional[int] = None,
+        nprobe: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        mode: str = "dense",
+    ) -> List[List[Tuple[str, Dict[str, Any], float]]]:
+        """Like `query` for several queries at once, returning one result list per query.
+        All queries are embedded in a single `embed_documents` request and, for exact or
+        filtered dense search, scored with one matrix-matrix product.
+        """
+        if not queries:
+            return []
+        snap = self._snapshot
+        candidates = self._candidates(snap, filters)
+        self._check_mode(snap, mode)
+        if snap.n_tools == 0 or (candidates is not None and not len(candidates)):
+            return [[] for _ in queries]
+        if mode == "lexical":
+            return [self._search(snap, q, None, top_k, mode, candidates) for q in queries]
+        query_embeds = self._embed_queries(queries)
+        if mode == "dense" and candidates is not None:
+            scores = normalize_rows(query_embeds) @ snap.vectors[candidates].T
+            return [
+                self._results(snap, *self._top_k(snap, row, top_k, candidates)) for row in scores
+            ]
+        if mode == "dense" and snap.index is None and snap.quantized is None:
+            scores = snap.mask(normalize_rows(query_embeds) @ snap.vectors.T)
+            return [self._results(snap, *self._top_k(snap, row, top_k)) for row in scores]
+        return [
+            self._search(
+                snap, text, q, top_k, mode, candidates, ef_search=ef_search, nprobe=nprobe
+            )
+            for text, q in zip(queries, query_embeds)
+        ]
+
+    def _check_mode(self, snap: _Snapshot, mode: str):
+        if mode not in ("dense", "lexical", "hybrid"):
+            raise ValueError(f"unknown mode: {mode} (expected 'dense', 'lexical' or 'hybrid')")
+        if mode != "dense" and snap.lexical is None:
+            raise ValueError(f"ToolMemory: mode={mode!r} needs lexical_index=True")
+
+    def _candidates(
+        self, snap: _Snapshot, filters: Optional[Dict[str, Any]]
+    ) -> Optional[np.ndarray]:
+        """Rows of live tools matching `filters`, or None when there are no filters."""
+        if not filters:
+            return None
+        if snap.metadata_index is None:
+            raise ValueError("ToolMemory: set filter_keys to filter queries by metadata")
+        mask = snap.metadata_index.mask(filters, snap.vectors.shape[0])
+        if snap.alive is not None:
+            mask &= snap.alive
+        return np.flatnonzero(mask)
+
+    def _cached_search(
+        self,
+        snap: _Snapshot,
+        query_text: str,
+        query_embed,
+        top_k: int,
+        mode: str,
+        candidates: Optional[np.ndarray],
+        filters: Optional[Dict[str, Any]],
+        **search_params: Optional[int],
+    ) -> List[Tuple[str, Dict[str, Any], float]]:
+        """`_search`, served from the semantic cache for dense queries close to a recent one."""
+        if self.semantic_cache is None or mode != "dense":
+            return self._search(
+                snap, query_text, query_embed, top_k, mode, candidates, **search_params
+            )
+        query = normalize_rows(query_embed)[0]
+        params = (top_k, freeze(filters), freeze(search_params))
+        results = self.semantic_cache.get(query, params, snap.version)
+        if results is None:
+            results = self._search(
+                snap, query_text, query, top_k, mode, candidates, **search_params
+            )
+            self.semantic_cache.put(query, params, snap.version, results)
+        return results
+
+    def _search(
+        self,
+        snap: _Snapshot,
+        query_text: str,
+        query_embed,
+        top_k: int,
+        mode: str = "dense",
+        candidates: Optional[np.ndarray] = None,
+        **search_params: Optional[int],
+    ) -> List[Tuple[str, Dict[str, Any], float]]:
+        if mode == "lexical":
+            lexical = snap.lexical.scores(query_text, snap.vectors.shape[0])
+            return self._results(snap, *self._lexical_top_k(snap, lexical, top_k, candidates))
+        query = normalize_rows(query_embed)[0]
+        if mode == "hybrid":
+            rows, scores = self._hybrid_top_k(
+                snap, query_text, query, top_k, candidates, search_params
+            )
+        else:
+            rows, scores = self._dense_top_k(snap, query, top_k, candidates, search_params)
+        return self._results(snap, rows, scores)
+
+    def _dense_top_k(
+        self,
+        snap: _Snapshot,
+        query: np.ndarray,
+        top_k: int,
+        candidates: Optional[np.ndarray],
+        search_params: Dict[str, Optional[int]],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows and cosine scores of the best `top_k` live tools for the normalized `query`."""
+        if candidates is not None:
+            return self._top_k(snap, snap.vectors[candidates] @ query, top_k, candidates)
+        if snap.index is None and snap.quantized is not None:
+            return self._quantized_top_k(snap, query, top_k)
+        if snap.index is None:
+            return self._top_k(snap, snap.mask(snap.vectors @ query), top_k)
+        # tombstones are skipped inside the search, so they cost no extra breadth
+        return snap.index.search(snap.vectors, query, top_k, alive=snap.alive, **search_params)
+
+    def _quantized_top_k(
+        self, snap: _Snapshot, query, top_k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        scores = snap.mask(snap.quantized.scores(query))
+        if self.rescore_factor <= 1:
+            return self._top_k(snap, scores, top_k)
+        candidates = top_k_indices(scores, top_k * self.rescore_factor)
+        candidates = candidates[np.isfinite(scores[candidates])]
+        return self._top_k(snap, snap.vectors[candidates] @ query, top_k, candidates)
+
+    def _lexical_top_k(
+        self,
+        snap: _Snapshot,
+        lexical: np.ndarray,
+        top_k: int,
+        candidates: Optional[np.ndarray],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows and BM25 scores of the best `top_k` live tools sharing a term with the query."""
+        rows = np.flatnonzero(lexical > 0) if candidates is None else candidates
+        rows, scores = snap.live(rows, lexical[rows])
+        rows, scores = rows[scores > 0], scores[scores > 0]
+        return self._top_k(snap, scores, top_k, rows)
+
+    def _hybrid_top_k(
+        self,
+        snap: _Snapshot,
+        query_text: str,
+        query: np.ndarray,
+        top_k: int,
+        candidates: Optional[np.ndarray],
+        search_params: Dict[str, Optional[int]],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Fuse the dense and BM25 rankings of the best few times `top_k` tools of each."""
+        depth = max(4 * top_k, 20)
+        lexical = snap.lexical.scores(query_text, snap.vectors.shape[0])
+        dense_rows, _ = self._dense_top_k(snap, query, depth, candidates, search_params)
+        lexical_rows, _ = self._lexical_top_k(snap, lexical, depth, candidates)
+        if self.fusion == "rrf":
+            fused: Dict[int, float] = {}
+            for ranked in (dense_rows, lexical_rows):
+                for rank, row in enumerate(ranked.tolist()):
+                    fused[row] = fused.get(row, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+            rows = np.array(list(fused), dtype=np.int64)
+            scores = np.array(list(fused.values()), dtype=np.float32)
+        else:
+            # weighted sum of the cosine and max-normalized BM25 scores of every candidate
+            rows = np.union1d(dense_rows, lexical_rows)
+            top = lexical[rows].max() if len(rows) else 0.0
+            bm25 = lexical[rows] / top if top > 0 else np.zeros(len(rows), dtype=np.float32)
+            dense = snap.vectors[rows] @ query
+            scores = self.fusion_alpha * dense + (1 - self.fusion_alpha) * bm25
+        return self._top_k(snap, scores, top_k, rows)
+
+    def train_index(self):
+        """(Re)train the index on the current tools (IVF centroids, PQ codebooks) and re-fit the
+        quantization ranges; no-op for what the store does not use.
+        """
+        with self._lock:
+            if self._index is not None and hasattr(self._index, "train"):
+                self._index.train(self._matrix.vectors)
+            if self._quantized is not None:
+                self._quantized.fit(self._matrix.vectors)
+            self._publish()
+
+    def _embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed `queries`, serving repeats from the query cache.
+        Cache misses are embedded together in a single request.
+        """
+        keys, results, missing = self._cached_query_embeddings(queries)
+        if missing:
+            texts = [str(queries[i]) for i in missing]
+            if len(texts) == 1:
+                fresh = [self.embeddings.embed_query(texts[0])]
+            else:
+                fresh = self.embeddings.embed_documents(texts)
+            self._cache_query_embeddings(keys, results, missing, fresh)
+        return results
+
+    async def _aembed_queries(self, queries: List[str]) -> List[List[float]]:
+        keys, results, missing = self._cached_query_embeddings(queries)
+        if missing:
+            texts = [str(queries[i]) for i in missing]
+            if len(texts) == 1:
+                fresh = [await self.embeddings.aembed_query(texts[0])]
+            else:
+                fresh = await self.embeddings.aembed_documents(texts)
+            self._cache_query_embeddings(keys, results, missing, fresh)
+        return results
+
+    def _cached_query_embeddings(self, queries: List[str]):
+        if self.query_cache is None:
+            return None, [None] * len(queries), list(range(len(queries)))
+        model = self._model_key()
+        keys = [(model, normalize_query(q)) for q in queries]
+        results = [self.query_cache.get(key) for key in keys]
+        return keys, results, [i for i, emb in enumerate(results) if emb is None]
+
+    def _cache_query_embeddings(self, keys, results, missing, fresh):
+        for i, emb in zip(missing, fresh):
+            if self.query_cache is not None:
+                self.query_cache.put(keys[i], emb)
+            results[i] = emb
+
+    def _top_k(
+        self, snap: _Snapshot, scores, top_k: int, rows: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Live rows and scores of the best `top_k` of `scores`, which are for `rows`
+        (default: every row).
+        """
+        best = top_k_indices(scores, top_k)
+        return snap.live(best if rows is None else rows[best], scores[best])
+
+    def _results(self, snap: _Snapshot, rows, scores) -> List[Tuple[str, Dict[str, Any], float]]:
+        return [
+            (snap.ids[i], snap.entries[i]["metadata"], float(score))
+            for i, score in zip(rows.tolist(), scores.tolist())
+        ]
+
+    def _index_rows(self, rows):
+        """Add (or relink) matrix `rows` in the ANN index and quantized copy, if any."""
+        if not len(rows):
+            return
+        unique_rows = list(dict.fromkeys(rows.tolist()))
+        if self._index is not None:
+            self._index.add(self._matrix.vectors, unique_rows)
+        if self._quantized is not None:
+            self._quantized.add(self._matrix.vectors, unique_rows)
+
+    def token_costs(self, tool_ids: List[str]) -> List[Optional[int]]:
+        """Token cost of each tool's metadata, counted at ingestion (None for unknown ids)."""
+        entries = [self._store.get(tool_id) for tool_id in tool_ids]
+        return [None if entry is None else entry["tokens"] for entry in entries]
 
     def get_all_tools(self) -> Dict[str, Dict[str, Any]]:
-        return self._store
+        snap = self._snapshot
+        return {
+            snap.ids[row]: dict(snap.entries[row], embedding=snap.vectors[row].tolist())
+            for row in range(snap.vectors.shape[0])
+            if snap.alive is None or snap.alive[row]
+        }
+
+    def _log(self, records: List[Dict[str, Any]]):
+        """Append `records` to the write-ahead log of persist_path, compacting if it grew large."""
+        binary = self.storage_format == "binary"
+        append_wal(wal_path(self.persist_path, binary), records)
+        self._wal_records += len(records)
+        if self.compact_threshold is not None and self._wal_records >= max(
+            self.compact_threshold, len(self._store)
+        ):
+            self.compact()
+
+    def compact(self):
+        """Fold the write-ahead log into a fresh snapshot of persist_path."""
+        self.save()
 
     def save(self, path: Optional[str] = None):
+        """Write a full snapshot. Saving to persist_path also truncates its write-ahead log."""
         p = path or self.persist_path
         if not p:
             raise ValueError("persist_path not set")
-        with open(p, "w", encoding="utf-8") as f:
-            json.dump(self._store, f, indent=2)
+        binary = self.storage_format == "binary"
+        with self._lock:
+            # snapshots hold live rows only, so the saved index must not refer to tombstones
+            self._purge()
+            self._publish()
+            # The index is written first, tagged with the id of the snapshot it belongs to:
+            # if the snapshot is not committed, the index is rebuilt on load
+            if binary:
+                snapshot_id = new_generation()
+            else:
+                data = json.dumps(self.get_all_tools(), indent=2).encode("utf-8")
+                snapshot_id = snapshot_digest(data)
+            if self._index is not None:
+                save_index(index_path(p, binary), self._index.state(), snapshot_id)
+            else:
+                remove_index(index_path(p, binary))
+            if binary:
+                save_binary(p, self._matrix.ids, self._matrix.vectors, self._entries, snapshot_id)
+            else:
+                save_json(p, data)
+            # only once the snapshot is durable may the log be dropped
+            if p == self.persist_path:
+                remove_wal(wal_path(p, binary))
+                self._wal_records = 0
+                if binary and self.resident_vectors:
+                    # Serve the float32 rows from the snapshot's page-cache-backed memory map
+                    # (non-resident rows already are in a memory-mapped scratch file)
+                    ids, vectors, _, _ = load_binary(p)
+                    self._matrix = self._new_matrix(ids, vectors)
+                    self._publish()
 
     def load(self, path: Optional[str] = None):
+        """Load the snapshot saved by `save` and replay its write-ahead log.
+        Binary stores (directories) are memory-mapped.
+        """
         p = path or self.persist_path
         if not p:
             raise ValueError("persist_path not set")
-        with open(p, encoding="utf-8") as f:
-            self._store = json.load(f)
+        binary = self.storage_format == "binary" or is_binary_store(p)
+        log = wal_path(p, binary)
+        with self._lock:
+            snapshot_id = None
+            if snapshot_exists(p, binary):
+                snapshot_id = self._load_snapshot(p, binary)
+                self._rebuild_entry_indexes()
+            elif os.path.exists(log):
+                self._reset()
+            else:
+                raise FileNotFoundError(p)
+            self._load_index(index_path(p, binary), snapshot_id)
+            if self.quantization:
+                self._quantized = ScalarQuantizedMatrix(self.quantization)
+                self._quantized.add(self._matrix.vectors, range(self._matrix.size))
 
+            records = read_wal(log)
+            self._replay(records)
+            # stores saved before token costs were recorded are counted once here
+            for entry in self._store.values():
+                if entry.get("tokens") is None:
+                    entry["tokens"] = tool_token_cost(entry["metadata"])
+            if p == self.persist_path:
+                self._wal_records = len(records)
+            self._publish()
 
-def create_tool(metadata: Dict[str, Any]) -> Optional[BaseTool]:
+    def _load_snapshot(self, p: str, binary: bool) -> Optional[str]:
+        """Load the snapshot at `p` and return its id (None for old binary stores)."""
+        if binary:
+            ids, vectors, entries, generation = load_binary(p)
+            self._matrix = self._new_matrix(ids, vectors)
+            self._store = dict(zip(ids, entries))
+            self._entries = list(entries)
+            return generation
+        with open(p, "rb") as f:
+            raw = f.read()
+        data = json.loads(raw)
+        matrix = self._new_matrix()
+        matrix.upsert(list(data), [entry["embedding"] for entry in data.values()])
+        self._store = {
+            tid: {
+                "metadata": entry["metadata"],
+                "text": entry.get("text"),
+                "tokens": entry.get("tokens"),
+            }
+            for tid, entry in data.items()
+        }
+        self._entries = list(self._store.values())
+        self._matrix = matrix
+        return snapshot_digest(raw)
+
+    def _load_index(self, p: str, snapshot_id: Optional[str]):
+        """Restore the saved ANN index, or rebuild it if missing, of another kind or saved
+        for another snapshot. Rows added after the index was saved are indexed incrementally.
+        """
+        if self.index_kind == "exact":
+            return
+        state = load_index(p, snapshot_id)
+        if state is not None and str(state["kind"]) == self.index_kind:
+            self._index = index_from_state(state)
+        else:
+            self._index = make_index(self.index_kind, self.index_params)
+        self._index_rows(np.arange(len(self._index), self._matrix.size))
+
+    def _replay(self, records: List[Dict[str, Any]]):
+        # Apply runs of consecutive upserts in one batch; later records win.
+        upserts: List[Dict[str, Any]] = []
+        for r in records + [{"op": "end"}]:
+            if r.get("op") == "upsert":
+                upserts.append(r)
+                continue
+            if upserts:
+                ids = [u["id"] for u in upserts]
+                rows = self._matrix.upsert(ids, [u["embedding"] for u in upserts])
+                self._index_rows(rows)
+                for u in upserts:
+                    self._store[u["id"]] = {
+                        "metadata": u["metadata"],
+                        "text": u.get("text"),
+                        "tokens": u.get("tokens"),
+                    }
+                self._add_entries(rows, ids)
+                upserts = []
+            if r.get("op") == "remove":
+                self._remove([r["id"]])
+
+
+def create_tool(
+    metadata: Dict[str, Any], registry: Optional[ToolRegistry] = None
+) -> Optional["BaseTool"]:
     """Convert metadata into a LangChain tool function using @tool wrapper.
 
     Expected metadata fields:
       - name: tool name (fallback _tool_id)
       - description: human-readable docstring
-      - function or callable: Python callable to invoke
+      - function: Python callable to invoke, or
+      - function_ref: key registered in `registry` (default: the process-wide registry)
+        or import path ("module:qualname") under its allowed modules, resolved on first use
 
     Returns:
       A decorated tool function or None if metadata invalid.
     """
 
     # Determine function to wrap
-    func = metadata.get("function")
-    if not callable(func):
+    func, _ = resolve_function(metadata, registry)
+    if func is None:
         return None
 
     # Determine name + description for the tool schema
     name = metadata.get("name", "")
     description = metadata.get("description", "")
 
+    # langchain.tools is slow to import, so it is only loaded once a tool is built
+    from langchain.tools import tool
+
     # Wrap the function with the tool decorator
     # Using dynamic decoration preserves signature
     decorated = tool(name_or_callable=name, description=description)(
@@ -0,0 +1,201 @@
+from typing import Dict, List, Optional, Sequence
+import tempfile
+
+import numpy as np
+
+
+# rows copied at a time when compacting a non-resident matrix
+_CHUNK = 4096
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    """Return `vectors` as a 2D float32 array with L2-normalized rows.
+    Zero vectors are left as zeros so they score 0 against everything.
+    """
+    arr = np.asarray(vectors, dtype=np.float32)
+    if arr.ndim == 1:
+        arr = arr.reshape(1, -1)
+    norms = np.linalg.norm(arr, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return arr / norms
+
+
+class EmbeddingMatrix:
+    """Contiguous float32 matrix of pre-normalized embeddings, one row per tool id.
+
+    Rows live in a buffer that grows geometrically, so adding tools is amortized
+    O(1) per row and cosine scoring against every tool is a single matrix-vector product.
+    Rows are never overwritten: re-embedding a tool appends a new row and tombstones the
+    old one, so a view of the first `size` rows stays valid while more are added. Removed
+    and replaced rows are scored as -inf until `compact()` drops them, so row numbers held
+    by indexes stay valid in between.
+    With `resident=False`, the buffer is an unlinked temporary file in `scratch_dir`
+    mapped into memory instead of process memory: its pages live in the OS page cache,
+    which can evict them, so only the rows being read need to be in RAM.
+    """
+
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        resident: bool = True,
+        scratch_dir: Optional[str] = None,
+    ):
+        self.dim = dim
+        self.resident = resident
+        self.scratch_dir = scratch_dir
+        # ids[row] is the tool of each row (including tombstoned rows)
+        self.ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._data = np.zeros((0, dim or 0), dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self.n_dead = 0
+
+    @classmethod
+    def from_normalized(
+        cls,
+        ids: Sequence[str],
+        vectors: np.ndarray,
+        resident: bool = True,
+        scratch_dir: Optional[str] = None,
+    ) -> "EmbeddingMatrix":
+        """Wrap already-normalized rows without copying (e.g. a read-only memory map).
+        The buffer is copied on the first write, into memory or (`resident=False`) into a
+        memory-mapped scratch file.
+        """
+        if vectors.ndim != 2 or vectors.shape[0] != len(ids):
+            raise ValueError(f"got {len(ids)} ids but embeddings of shape {vectors.shape}")
+        matrix = cls(vectors.shape[1] if len(ids) else None, resident, scratch_dir)
+        if len(ids):
+            matrix.ids = list(ids)
+            matrix._rows = {tool_id: row for row, tool_id in enumerate(matrix.ids)}
+            matrix._data = vectors
+            matrix._alive = np.ones(len(ids), dtype=bool)
+        return matrix
+
+    def __len__(self) -> int:
+        """Number of live tools."""
+        return len(self._rows)
+
+    def __contains__(self, tool_id: object) -> bool:
+        return tool_id in self._rows
+
+    @property
+    def size(self) -> int:
+        """Number of rows, tombstones included."""
+        return len(self.ids)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """View of the populated rows (shape: size x dim)."""
+        return self._data[: len(self.ids)]
+
+    @property
+    def alive(self) -> np.ndarray:
+        """Boolean mask of the rows that are not tombstoned."""
+        return self._alive[: len(self.ids)]
+
+    def row(self, tool_id: str) -> np.ndarray:
+        return self._data[self._rows[tool_id]]
+
+    def _alloc(self, rows: int) -> np.ndarray:
+        """Zeroed buffer of `rows` rows, in memory or in a memory-mapped scratch file."""
+        if self.resident:
+            return np.zeros((rows, self.dim), dtype=np.float32)
+        # the file is unlinked as soon as it is created and freed once no array maps it
+        with tempfile.TemporaryFile(dir=self.scratch_dir) as f:
+            f.truncate(rows * self.dim * np.dtype(np.float32).itemsize)
+            return np.memmap(f, dtype=np.float32, mode="r+", shape=(rows, self.dim))
+
+    def _reserve(self, size: int) -> None:
+        capacity = self._data.shape[0]
+        if size <= capacity and self._data.flags.writeable:
+            return
+        new_capacity = max(size, capacity * 2, 16)
+        data = self._alloc(new_capacity)
+        data[:capacity] = self._data
+        # also detaches from a read-only memory map
+        self._data = data
+        alive = np.zeros(new_capacity, dtype=bool)
+        alive[: len(self._alive)] = self._alive
+        self._alive = alive
+
+    def upsert(self, ids: Sequence[str], vectors) -> np.ndarray:
+        """Append rows for `ids` (one per unique id, in order of first appearance; later
+        duplicates win) and return their row numbers. Previous rows of the ids are
+        tombstoned.
+        """
+        if not len(ids):
+            return np.empty(0, dtype=np.int64)
+        vecs = normalize_rows(vectors)
+        if vecs.shape[0] != len(ids):
+            raise ValueError(f"got {len(ids)} ids but {vecs.shape[0]} embeddings")
+        if self.dim is None:
+            self.dim = vecs.shape[1]
+            self._data = np.zeros((0, self.dim), dtype=np.float32)
+        elif vecs.shape[1] != self.dim:
+            raise ValueError(
+                f"embedding dimension {vecs.shape[1]} does not match store dimension {self.dim}"
+            )
+
+        latest: Dict[str, int] = {}
+        for i, tool_id in enumerate(ids):
+            latest[tool_id] = i
+        self.remove(list(latest))
+        start = len(self.ids)
+        rows = np.arange(start, start + len(latest), dtype=np.int64)
+        self._reserve(start + len(latest))
+        self._data[rows] = vecs[list(latest.values())]
+        self._alive[rows] = True
+        for row, tool_id in zip(rows.tolist(), latest):
+            self._rows[tool_id] = row
+            self.ids.append(tool_id)
+        return rows
+
+    def remove(self, ids: Sequence[str]) -> np.ndarray:
+        """Tombstone the rows of `ids` (unknown ids are ignored) and return them."""
+        rows = np.array([self._rows.pop(i) for i in ids if i in self._rows], dtype=np.int64)
+        self._alive[rows] = False
+        self.n_dead += len(rows)
+        return rows
+
+    def compact(self) -> np.ndarray:
+        """Drop tombstoned rows. Returns the old row number of each remaining row, so
+        indexes can remap theirs.
+        """
+        keep = np.flatnonzero(self.alive)
+        if self.resident or self.dim is None:
+            self._data = self._data[keep]
+        else:
+            # copied in chunks so the rows are never all in process memory at once
+            data = self._alloc(max(len(keep), 16))
+            for start in range(0, len(keep), _CHUNK):
+                rows = keep[start : start + _CHUNK]
+                data[start : start + len(rows)] = self._data[rows]
+            self._data = data
+        self._alive = np.zeros(self._data.shape[0], dtype=bool)
+        self._alive[: len(keep)] = True
+        self.ids = [self.ids[row] for row in keep.tolist()]
+        self._rows = {tool_id: row for row, tool_id in enumerate(self.ids)}
+        self.n_dead = 0
+        return keep
+
+    def scores(self, query_vector) -> np.ndarray:
+        """Cosine similarity of `query_vector` against every row (-inf for tombstones)."""
+        scores = self.vectors @ normalize_rows(query_vector)[0]
+        if self.n_dead:
+            scores[~self.alive] = -np.inf
+        return scores
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the `k` highest scores, best first.
+    Uses `argpartition` so selection is O(n + k log k) instead of a full sort.
+    """
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        idx = np.argpartition(scores, n - k)[n - k :]
+    else:
+        idx = np.arange(n)
+    return idx[np.argsort(-scores[idx], kind="stable")]